@@ -0,0 +1,168 @@
+"""
+Admission control for OCR requests
+
+At most OCR_MAX_CONCURRENCY documents are in the OCR/Gemini pipeline at
+once; further requests wait in a bounded FIFO queue. When the queue is full
+(or a request has waited OCR_ADMISSION_WAIT_SECONDS) the request is refused
+with a Retry-After estimated from how fast the queue has been draining, so
+a burst of uploads can't exhaust the free-tier API quotas for everyone.
+
+State is per worker process, like the OCR job queue.
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Optional
+
+DRAIN_WINDOW_SECONDS = 60  # Completions counted for the drain rate
+DEFAULT_RETRY_AFTER = 5
+MAX_RETRY_AFTER = 120
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request can't be admitted; retry_after is in seconds"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Too busy, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Concurrency limit with a bounded FIFO wait queue"""
+
+    def __init__(self, max_concurrency: int, max_queue: int, max_wait_seconds: Optional[float] = None):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_wait_seconds = max_wait_seconds
+
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._completions: Deque[float] = deque()  # monotonic release times
+        self._waits: Deque[float] = deque(maxlen=500)  # seconds spent queued
+        self._service_times: Deque[float] = deque(maxlen=200)  # seconds holding a slot
+
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def check(self):
+        """Refuse up front (before reading an upload) when the queue is already full"""
+        if self.in_flight >= self.max_concurrency and self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise AdmissionRejected(self.retry_after())
+
+    @asynccontextmanager
+    async def slot(self, bounded: bool = True):
+        """
+        Hold one of the concurrency slots for the duration of the block
+
+        Args:
+            bounded: False lets the caller wait for a slot however full the
+                queue is and however long it takes (for work that is
+                already bounded elsewhere, e.g. OCR jobs)
+
+        Raises:
+            AdmissionRejected: queue full, or waited longer than max_wait_seconds
+                (bounded callers only)
+        """
+        await self._acquire(bounded)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._service_times.append(time.monotonic() - started)
+            self._release()
+
+    def retry_after(self) -> int:
+        """Seconds until a new request would likely get a slot"""
+        ahead = self.waiting + 1
+        rate = self.drain_rate()
+        if rate:
+            seconds = ahead / rate
+        elif self._service_times:
+            # Nothing finished lately - estimate from how long documents take
+            average = sum(self._service_times) / len(self._service_times)
+            seconds = average * ahead / self.max_concurrency
+        else:
+            seconds = DEFAULT_RETRY_AFTER
+        return max(1, min(MAX_RETRY_AFTER, math.ceil(seconds)))
+
+    def drain_rate(self) -> float:
+        """Requests finished per second over the last DRAIN_WINDOW_SECONDS"""
+        now = time.monotonic()
+        self._trim_completions(now)
+        if not self._completions:
+            return 0.0
+        # Measured over the window, or since the oldest completion right after startup
+        span = max(1.0, now - self._completions[0])
+        return len(self._completions) / span
+
+    def stats(self) -> dict:
+        waits = sorted(self._waits)
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queue_depth": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "drain_rate_per_second": round(self.drain_rate(), 3),
+            "avg_wait_seconds": round(sum(waits) / len(waits), 3) if waits else None,
+            "p95_wait_seconds": round(waits[int(0.95 * (len(waits) - 1))], 3) if waits else None,
+        }
+
+    async def _acquire(self, bounded: bool):
+        if self.in_flight < self.max_concurrency and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            self._waits.append(0.0)
+            return
+
+        if bounded and self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise AdmissionRejected(self.retry_after())
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        queued_at = time.monotonic()
+        try:
+            # _release() hands its slot over by resolving the future
+            await asyncio.wait_for(waiter, self.max_wait_seconds if bounded else None)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            self.rejected += 1
+            raise AdmissionRejected(self.retry_after())
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._release()  # Got a slot just as the client went away
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+        self.admitted += 1
+        self._waits.append(time.monotonic() - queued_at)
+
+    def _release(self):
+        now = time.monotonic()
+        self._completions.append(now)
+        self._trim_completions(now)
+
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)  # Slot passes straight to the next in line
+                return
+        self.in_flight -= 1
+
+    def _trim_completions(self, now: float):
+        while self._completions and self._completions[0] < now - DRAIN_WINDOW_SECONDS:
+            self._completions.popleft()
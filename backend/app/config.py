@@ -1,4 +1,5 @@
 from pydantic_settings import BaseSettings
+from datetime import date
 from typing import Optional
 
 class Settings(BaseSettings):
@@ -16,7 +17,73 @@ class Settings(BaseSettings):
     # Gemini API (Free - for intelligent date extraction)
     GEMINI_API_KEY: Optional[str] = None
     
-    # Google Cloud Vision (Alternative - requires billing)
+    # Outgoing OCR / Gemini HTTP calls
+    OCR_HTTP_TIMEOUT_SECONDS: float = 60.0
+    
+    # Local image preprocessing before OCR upload
+    OCR_PREPROCESS_ENABLED: bool = True
+    OCR_MAX_IMAGE_SIDE: int = 2000  # px, longest side sent to OCR
+    OCR_JPEG_QUALITY: int = 85
+    OCR_PROCESS_WORKERS: Optional[int] = None  # Process pool size (default: CPU count)
+    OCR_LOG_LEVEL: str = "INFO"  # DEBUG logs the full OCR text and per-stage timings
+
+    # OCR provider routing (see app/ocr_providers.py)
+    OCR_PROVIDERS: str = "ocr_space,google_vision"  # Remote providers in order of preference
+    OCR_PROVIDER_TIMEOUT_SECONDS: float = 30.0  # Deadline per provider call
+    OCR_CIRCUIT_FAILURE_THRESHOLD: int = 3  # Consecutive failures before a provider is skipped
+    OCR_CIRCUIT_RESET_SECONDS: int = 60  # Then a single trial call is let through
+    OCR_HEDGE_ENABLED: bool = True  # Start the next provider when a call exceeds its p95
+    OCR_HEDGE_MIN_SAMPLES: int = 20  # Latency samples needed before hedging
+    
+    # Local OCR engine (Tesseract, optional - needs pytesseract + tesseract binary)
+    OCR_LOCAL_ENGINE_MODE: str = "off"  # off, primary, fallback or race (vs first remote provider)
+    OCR_LOCAL_LANGUAGE: str = "eng"
+
+    # Admission control in front of the OCR pipeline (per worker process)
+    OCR_MAX_CONCURRENCY: int = 8  # Documents in OCR / Gemini at once
+    OCR_ADMISSION_QUEUE_SIZE: int = 32  # Waiting documents before 429 Too Many Requests
+    OCR_ADMISSION_WAIT_SECONDS: float = 60.0  # Longest wait for a slot before 429
+
+    # Batch OCR endpoint
+    OCR_BATCH_MAX_FILES: int = 20
+    OCR_BATCH_CONCURRENCY: int = 4  # Documents processed at once per batch
+
+    # PDF uploads (rasterized locally with pypdfium2, optional)
+    OCR_PDF_MAX_PAGES: int = 20  # Pages scanned before giving up
+    OCR_PDF_PAGE_CONCURRENCY: int = 2  # Pages OCR'd at once
+    OCR_PDF_RENDER_DPI: int = 200
+
+    # Background OCR jobs (run and kept in memory by the accepting worker)
+    OCR_JOB_WORKERS: int = 4
+    OCR_JOB_QUEUE_SIZE: int = 100  # Further submissions get 503 until it drains
+    OCR_JOB_QUEUE_MAX_MB: int = 200  # Images held in memory by queued jobs (503 beyond)
+    OCR_JOB_SOCKET_DIR: Optional[str] = None  # Per-worker sockets polls are routed through (default: <tmp>/datekeeper-ocr-jobs)
+    OCR_JOB_POLL_INTERVAL_SECONDS: float = 0.5  # SSE streams re-ask the worker running the job
+    OCR_JOB_RESULT_TTL_SECONDS: int = 300  # How long finished results are kept
+    
+    # OCR result cache (keyed by image hash, derived fields only)
+    OCR_RESULT_CACHE_SIZE: int = 512
+    OCR_RESULT_CACHE_TTL_SECONDS: int = 86400  # 24 hours
+    OCR_RESULT_CACHE_DIR: Optional[str] = None  # Set to enable the on-disk tier
+    
+    # Expiry extraction: scanner answers scoring at least this skip Gemini (0-1)
+    OCR_CONFIDENCE_THRESHOLD: float = 0.8
+    OCR_REFERENCE_DATE: Optional[date] = None  # Pin "today" for date plausibility (benchmark replays)
+    
+    # Gemini prompt: only lines around dates / expiry labels are sent
+    GEMINI_PROMPT_CHAR_BUDGET: int = 1200
+    GEMINI_PROMPT_CONTEXT_LINES: int = 1  # Neighbouring lines kept around each match
+    
+    # Batched Gemini extraction (batch uploads: several documents per request)
+    GEMINI_BATCH_SIZE: int = 10
+    GEMINI_BATCH_WINDOW_SECONDS: float = 0.5  # Collect unsure documents before calling
+    GEMINI_BATCH_MODEL: str = "gemini-1.5-flash"  # Needs JSON response schema support
+    
+    # Gemini answer cache (keyed by the normalized prompt excerpt)
+    GEMINI_CACHE_SIZE: int = 1024
+    GEMINI_CACHE_TTL_SECONDS: int = 604800  # 7 days
+    
+    # Google Cloud Vision (OCR provider - requires billing)
     GOOGLE_CLOUD_API_KEY: Optional[str] = None
     GOOGLE_APPLICATION_CREDENTIALS_JSON: Optional[str] = None
     
@@ -39,6 +106,23 @@ class Settings(BaseSettings):
     TWILIO_AUTH_TOKEN: Optional[str] = None
     TWILIO_PHONE_NUMBER: Optional[str] = None  # Format: +1234567890
     
+    # Notification delivery (independent worker pool per channel)
+    EMAIL_WORKERS: int = 2
+    SMS_WORKERS: int = 2
+    NOTIFICATION_DRAIN_TIMEOUT: int = 300  # Seconds the sweep waits for deliveries
+    
+    # In-app notifications (Server-Sent Events)
+    NOTIFICATION_STREAM_KEEPALIVE_SECONDS: int = 25
+    
+    # Webhook notifications (business / enterprise tiers)
+    WEBHOOK_BATCH_WINDOW_SECONDS: float = 2.0  # Collect reminders per endpoint
+    WEBHOOK_MAX_BATCH_SIZE: int = 50
+    WEBHOOK_MAX_CONCURRENCY_PER_ENDPOINT: int = 2
+    WEBHOOK_MAX_RETRIES: int = 3
+    WEBHOOK_RETRY_BACKOFF_SECONDS: float = 2.0
+    WEBHOOK_TIMEOUT_SECONDS: float = 10.0
+    WEBHOOK_ALLOW_PRIVATE_HOSTS: bool = False  # Loopback/private targets, for local testing only
+    
     # SendGrid (Alternative email service)
     SENDGRID_API_KEY: Optional[str] = None
     SENDGRID_FROM_EMAIL: str = "noreply@example.com"
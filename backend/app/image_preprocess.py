@@ -0,0 +1,53 @@
+"""
+Image preprocessing before OCR upload
+
+Phone photos arrive at up to 10 MB; OCR only needs a fraction of that:
+- Fix EXIF orientation
+- Convert to grayscale
+- Downscale to OCR resolution (JPEG draft mode decodes at reduced scale)
+- Re-encode as a compact JPEG
+
+Functions here run inside the shared process pool, so they must stay
+top-level and only take/return picklable values.
+"""
+
+import io
+from PIL import Image, ImageOps
+
+def preprocess_image(data: bytes, max_side: int = 2000, quality: int = 85):
+    """
+    Prepare an image for OCR
+    
+    Args:
+        data: Original image bytes (JPEG/PNG/WEBP)
+        max_side: Longest side in pixels after downscaling
+        quality: JPEG quality of the re-encoded image
+    
+    Returns:
+        tuple: (image bytes, content type) - the original bytes and None
+               when the input can't be decoded or processing doesn't help
+    """
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            width, height = img.size
+            scale = min(1.0, max_side / max(width, height))
+            target = (max(1, int(width * scale)), max(1, int(height * scale)))
+            
+            if img.format == "JPEG" and scale < 1.0:
+                # Let libjpeg decode at 1/2, 1/4 or 1/8 scale directly
+                img.draft("L", target)
+            
+            processed = ImageOps.exif_transpose(img).convert("L")
+            # No-op when the image already fits
+            processed.thumbnail((max_side, max_side), Image.LANCZOS)
+            
+            out = io.BytesIO()
+            processed.save(out, "JPEG", quality=quality, optimize=True)
+    except Exception:
+        return data, None
+    
+    result = out.getvalue()
+    if len(result) >= len(data):
+        # Already compact - keep the original
+        return data, None
+    return result, "image/jpeg"
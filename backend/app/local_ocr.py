@@ -0,0 +1,53 @@
+"""
+Local OCR engine (Tesseract via pytesseract)
+
+Optional backend for when OCR.space is slow, rate limited or unreachable.
+Needs the `pytesseract` package and the `tesseract` binary; when either is
+missing the service keeps using OCR.space only.
+
+ocr_image() runs inside the shared process pool, so it stays top-level
+and only takes/returns picklable values.
+"""
+
+import io
+import logging
+
+logger = logging.getLogger(__name__)
+
+_available = None
+
+def is_available() -> bool:
+    """True when pytesseract and the tesseract binary can be used (checked once)"""
+    global _available
+    if _available is None:
+        try:
+            import pytesseract
+            version = pytesseract.get_tesseract_version()
+            logger.info(f"🖥️  Local OCR engine available (Tesseract {version})")
+            _available = True
+        except ImportError:
+            logger.warning("⚠️  pytesseract not installed. Run: pip install pytesseract")
+            _available = False
+        except Exception as e:
+            logger.warning(f"⚠️  Tesseract binary not usable: {e}")
+            _available = False
+    return _available
+
+def ocr_image(data: bytes, language: str = "eng") -> str:
+    """
+    Run Tesseract on an image
+
+    Args:
+        data: Image bytes (already preprocessed when enabled)
+        language: Tesseract language code(s), e.g. "eng" or "eng+fra"
+
+    Returns:
+        str: Extracted text
+    """
+    import pytesseract
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image)
+        # Page segmentation 3: fully automatic layout (cards, pages, receipts)
+        return pytesseract.image_to_string(image, lang=language, config="--psm 3")
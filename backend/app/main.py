@@ -1,12 +1,17 @@
+import logging
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
 from app.database import engine, Base
-from app.routers import ocr, documents, scheduler, auth, google_auth
+from app.routers import ocr, documents, scheduler, auth, google_auth, notifications
 from app.scheduler import start_scheduler, stop_scheduler
 
 # Import models to create tables
-from app.models import document, user
+from app.models import document, user, notification
+
+# OCR pipeline log level (DEBUG adds the full OCR text and per-stage timings)
+for logger_name in ("app.ocr_service", "app.ocr_providers", "app.ocr_metrics"):
+    logging.getLogger(logger_name).setLevel(settings.OCR_LOG_LEVEL.upper())
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
@@ -35,6 +40,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # Document list pagination
 )
 
 # Include routers
@@ -43,6 +49,7 @@ app.include_router(google_auth.router)
 app.include_router(ocr.router)
 app.include_router(documents.router)
 app.include_router(scheduler.router)
+app.include_router(notifications.router)
 
 @app.on_event("startup")
 def startup_event():
@@ -68,9 +75,22 @@ def startup_event():
 @app.on_event("shutdown")
 def shutdown_event():
     """Run on application shutdown"""
+    from app.webhook_service import webhook_dispatcher
+    
     stop_scheduler()
+    webhook_dispatcher.shutdown()
     print("👋 Application shutting down")
 
+@app.on_event("shutdown")
+async def close_ocr_resources():
+    """Stop OCR job workers, pooled HTTP clients and OCR worker processes"""
+    from app.routers.ocr import ocr_service, ocr_jobs
+    from app.process_pool import shutdown_process_pool
+    
+    await ocr_jobs.shutdown()
+    await ocr_service.aclose()
+    shutdown_process_pool()
+
 @app.get("/")
 def read_root():
     return {
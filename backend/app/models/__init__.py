@@ -1,4 +1,5 @@
 from app.models.document import Document
 from app.models.user import User
+from app.models.notification import Notification
 
-__all__ = ["Document", "User"]
+__all__ = ["Document", "User", "Notification"]
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Date, DateTime, JSON, Integer
+from sqlalchemy import Column, String, Date, DateTime, JSON, Integer, Index
 from sqlalchemy.dialects.postgresql import UUID
 from datetime import datetime
 import uuid
@@ -6,6 +6,12 @@ from app.database import Base
 
 class Document(Base):
     __tablename__ = "documents"
+    __table_args__ = (
+        # Dashboard listing: WHERE user_id = ? AND (expiry_date, id) > cursor ORDER BY expiry_date, id
+        Index("idx_documents_user_expiry_id", "user_id", "expiry_date", "id"),
+        # Dashboard stats: WHERE user_id = ? GROUP BY status
+        Index("idx_documents_user_status", "user_id", "status"),
+    )
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String, nullable=False, index=True)
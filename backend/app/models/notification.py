@@ -0,0 +1,34 @@
+from sqlalchemy import Column, String, DateTime, Boolean, Integer, Text, Index
+from datetime import datetime
+from app.database import Base
+
+class Notification(Base):
+    __tablename__ = "notifications"
+    __table_args__ = (
+        # Unread badge: COUNT(*) WHERE user_id = ? AND is_read = false
+        Index("idx_notifications_user_unread", "user_id", "is_read"),
+        # Feed / SSE catch-up: WHERE user_id = ? AND id > ? ORDER BY id
+        Index("idx_notifications_user_id_id", "user_id", "id"),
+    )
+    
+    # Sequential id doubles as the SSE event id / resume cursor
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(String, nullable=False)
+    document_id = Column(String, nullable=True)
+    kind = Column(String(30), nullable=False)  # reminder, status_change
+    title = Column(String(255), nullable=False)
+    message = Column(Text, nullable=True)
+    is_read = Column(Boolean, default=False, nullable=False)
+    
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "document_id": self.document_id,
+            "kind": self.kind,
+            "title": self.title,
+            "message": self.message,
+            "is_read": self.is_read,
+            "created_at": self.created_at.isoformat() if self.created_at else None
+        }
@@ -19,6 +19,10 @@ class User(Base):
     notify_sms = Column(String(1), default="N")    # Y/N
     alternate_email = Column(String(255), nullable=True)  # Optional alternate email
     
+    # Webhook channel (business / enterprise tiers)
+    webhook_url = Column(String(500), nullable=True)
+    webhook_secret = Column(String(64), nullable=True)  # HMAC signing secret
+    
     # Reminder preferences (stored as JSON string in SQLite)
     _reminder_intervals = Column('reminder_intervals', Text, nullable=True)
     
@@ -66,6 +70,7 @@ class User(Base):
             "notify_email": self.notify_email,
             "notify_sms": self.notify_sms,
             "alternate_email": self.alternate_email,
+            "webhook_url": self.webhook_url,
             "reminder_intervals": self.reminder_intervals or {
                 "6_months": True,
                 "3_months": True,
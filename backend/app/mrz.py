@@ -0,0 +1,203 @@
+"""
+ICAO 9303 machine-readable zone (MRZ) parser
+
+Passports (TD3, 2 x 44), visas / older IDs (TD2, 2 x 36) and ID cards
+(TD1, 3 x 30) print the expiry date at fixed positions protected by
+check digits. When every check digit validates, the result is trusted
+outright and the OCR pipeline skips Gemini and the date regexes.
+"""
+
+import re
+from dataclasses import dataclass
+from datetime import date
+from typing import List, Optional
+from app.text_scanner import reference_today
+
+# (format, line length, line count)
+MRZ_FORMATS = [("TD3", 44, 2), ("TD2", 36, 2), ("TD1", 30, 3)]
+
+# OCR engines often drop trailing '<' fillers or add a stray character
+LENGTH_TOLERANCE = 2
+
+_MRZ_LINE = re.compile(r'^[A-Z0-9<]+$')
+
+# Letters OCR commonly reads in place of digits inside numeric fields
+_DIGIT_FIXES = str.maketrans({'O': '0', 'Q': '0', 'D': '0', 'I': '1', 'L': '1', 'Z': '2', 'S': '5', 'B': '8', 'G': '6'})
+
+
+@dataclass
+class MRZResult:
+    """Validated fields from a machine-readable zone"""
+    format: str              # TD1, TD2 or TD3
+    document_code: str       # P, V, I, ID, AC, ...
+    document_type: str       # passport, visa, national_id
+    issuing_country: str
+    document_number: str
+    nationality: str
+    birth_date: Optional[date]
+    expiry_date: date
+    sex: str
+
+
+def check_digit(field: str) -> int:
+    """ICAO 9303 check digit (weights 7, 3, 1; A=10 ... Z=35; '<'=0)"""
+    total = 0
+    for i, char in enumerate(field):
+        if char.isdigit():
+            value = int(char)
+        elif char.isalpha():
+            value = ord(char) - ord('A') + 10
+        else:
+            value = 0
+        total += value * (7, 3, 1)[i % 3]
+    return total % 10
+
+
+def _valid(field: str, digit: str) -> bool:
+    # An unused optional field may carry '<' instead of 0
+    if digit == '<':
+        return field.strip('<') == ''
+    return digit.isdigit() and check_digit(field) == int(digit)
+
+
+def _numeric(field: str) -> str:
+    return field.translate(_DIGIT_FIXES)
+
+
+def _parse_yymmdd(value: str, future: bool) -> Optional[date]:
+    """Expiry dates are this century; birth dates are never in the future"""
+    if not value.isdigit():
+        return None
+    yy, month, day = int(value[:2]), int(value[2:4]), int(value[4:])
+    this_year = reference_today().year
+    century = this_year // 100 * 100
+    year = century + yy
+    if not future and year > this_year:
+        year -= 100
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+def _document_type(code: str) -> str:
+    if code.startswith('P'):
+        return 'passport'
+    if code.startswith('V'):
+        return 'visa'
+    return 'national_id'
+
+
+def _clean_lines(text: str) -> List[str]:
+    """Upper-case, drop spaces and keep lines that look like MRZ"""
+    lines = []
+    for line in text.splitlines():
+        line = re.sub(r'\s+', '', line.upper()).replace('«', '<')
+        if len(line) >= 30 - LENGTH_TOLERANCE and _MRZ_LINE.match(line):
+            lines.append(line)
+    return lines
+
+
+def _fit(line: str, length: int) -> Optional[str]:
+    """Pad/trim a line to the format length, or None if it's too far off"""
+    if abs(len(line) - length) > LENGTH_TOLERANCE:
+        return None
+    return line[:length].ljust(length, '<')
+
+
+def _parse_td3_td2(fmt: str, line1: str, line2: str) -> Optional[MRZResult]:
+    # Both share the same second-line layout; only the optional data differs
+    length = len(line2)
+    number, number_cd = line2[0:9], line2[9]
+    nationality = line2[10:13]
+    birth, birth_cd = _numeric(line2[13:19]), _numeric(line2[19])
+    sex = line2[20]
+    expiry, expiry_cd = _numeric(line2[21:27]), _numeric(line2[27])
+    composite_cd = _numeric(line2[length - 1])
+
+    if fmt == "TD3":
+        optional, optional_cd = line2[28:42], _numeric(line2[42])
+        if not _valid(optional, optional_cd):
+            return None
+        composite = number + number_cd + birth + birth_cd + expiry + expiry_cd + optional + optional_cd
+    else:
+        composite = number + number_cd + birth + birth_cd + expiry + expiry_cd + line2[28:35]
+
+    if not (_valid(number, number_cd) and _valid(birth, birth_cd)
+            and _valid(expiry, expiry_cd) and _valid(composite, composite_cd)):
+        return None
+
+    expiry_date = _parse_yymmdd(expiry, future=True)
+    if expiry_date is None:
+        return None
+
+    code = line1[0:2].rstrip('<')
+    return MRZResult(
+        format=fmt,
+        document_code=code,
+        document_type=_document_type(code),
+        issuing_country=line1[2:5].rstrip('<'),
+        document_number=number.rstrip('<'),
+        nationality=nationality.rstrip('<'),
+        birth_date=_parse_yymmdd(birth, future=False),
+        expiry_date=expiry_date,
+        sex=sex
+    )
+
+
+def _parse_td1(line1: str, line2: str, line3: str) -> Optional[MRZResult]:
+    number, number_cd = line1[5:14], line1[14]
+    birth, birth_cd = _numeric(line2[0:6]), _numeric(line2[6])
+    sex = line2[7]
+    expiry, expiry_cd = _numeric(line2[8:14]), _numeric(line2[14])
+    composite = line1[5:30] + birth + birth_cd + expiry + expiry_cd + line2[18:29]
+    composite_cd = _numeric(line2[29])
+
+    if not (_valid(number, number_cd) and _valid(birth, birth_cd)
+            and _valid(expiry, expiry_cd) and _valid(composite, composite_cd)):
+        return None
+
+    expiry_date = _parse_yymmdd(expiry, future=True)
+    if expiry_date is None:
+        return None
+
+    code = line1[0:2].rstrip('<')
+    return MRZResult(
+        format="TD1",
+        document_code=code,
+        document_type=_document_type(code),
+        issuing_country=line1[2:5].rstrip('<'),
+        document_number=number.rstrip('<'),
+        nationality=line2[15:18].rstrip('<'),
+        birth_date=_parse_yymmdd(birth, future=False),
+        expiry_date=expiry_date,
+        sex=sex
+    )
+
+
+def parse_mrz(text: str) -> Optional[MRZResult]:
+    """
+    Find and validate an MRZ in OCR text
+
+    Args:
+        text: Full OCR output (MRZ lines anywhere in it)
+
+    Returns:
+        MRZResult when a zone is found and all check digits validate, else None
+    """
+    if '<<' not in text:
+        return None  # Fast exit: every MRZ contains filler runs
+
+    lines = _clean_lines(text)
+    for fmt, length, count in MRZ_FORMATS:
+        for i in range(len(lines) - count + 1):
+            window = [_fit(line, length) for line in lines[i:i + count]]
+            if None in window:
+                continue
+            if fmt == "TD1":
+                result = _parse_td1(*window)
+            else:
+                result = _parse_td3_td2(fmt, *window)
+            if result:
+                return result
+    return None
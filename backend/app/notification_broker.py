@@ -0,0 +1,62 @@
+"""
+Notification Broker
+
+Wakes connected Server-Sent Events streams when new in-app notifications
+are written. The scheduler runs in a background thread, so publishing is
+thread-safe and hands the wake-up to each subscriber's event loop.
+
+Only a wake-up signal is sent; streams read the rows themselves from the
+`notifications` table, so nothing is lost if a signal is missed (streams
+also re-check on their keep-alive interval).
+"""
+
+import asyncio
+import threading
+from typing import Iterable
+
+
+class NotificationBroker:
+    """In-process fan-out of "new notifications" signals per user"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}  # user_id -> set of (loop, asyncio.Event)
+
+    def subscribe(self, user_id: str) -> asyncio.Event:
+        """Register the calling stream; must be called from its event loop"""
+        event = asyncio.Event()
+        entry = (asyncio.get_running_loop(), event)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(entry)
+        return event
+
+    def unsubscribe(self, user_id: str, event: asyncio.Event):
+        with self._lock:
+            entries = self._subscribers.get(user_id, set())
+            entries.difference_update({e for e in entries if e[1] is event})
+            if not entries:
+                self._subscribers.pop(user_id, None)
+
+    def publish(self, user_ids: Iterable[str]):
+        """Wake every stream of the given users (safe from any thread)"""
+        with self._lock:
+            targets = [
+                entry
+                for user_id in set(user_ids)
+                for entry in self._subscribers.get(user_id, ())
+            ]
+        for loop, event in targets:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # Loop already closed (worker shutting down)
+                pass
+
+    @property
+    def connection_count(self) -> int:
+        with self._lock:
+            return sum(len(entries) for entries in self._subscribers.values())
+
+
+# Singleton instance
+notification_broker = NotificationBroker()
@@ -0,0 +1,142 @@
+"""
+Notification Dispatcher
+
+Fans reminders out to independent per-channel queues:
+- Each channel (email, SMS) has its own queue and worker pool
+- Each channel keeps its own delivery/failure counters
+- A slow channel (e.g. SMTP greylisting) never holds up the others
+"""
+
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Optional
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ChannelQueue:
+    """Queue + worker pool for a single notification channel"""
+
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = max(1, workers)
+        self._queue = queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+
+        # Failure accounting (per channel)
+        self.enqueued = 0
+        self.sent = 0
+        self.failed = 0
+        self.last_error: Optional[str] = None
+        self.last_failure_at: Optional[str] = None
+
+    def submit(self, send: Callable[..., bool], description: str, **kwargs):
+        """Queue a delivery; workers are started on first use"""
+        self._ensure_workers()
+        with self._lock:
+            self.enqueued += 1
+        self._queue.put((send, description, kwargs))
+
+    def wait_until_idle(self, timeout: Optional[float] = None) -> bool:
+        """Block until every queued delivery has finished (or timeout)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "pending": self._queue.unfinished_tasks,
+                "enqueued": self.enqueued,
+                "sent": self.sent,
+                "failed": self.failed,
+                "last_error": self.last_error,
+                "last_failure_at": self.last_failure_at,
+            }
+
+    def _ensure_workers(self):
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(
+                    target=self._worker,
+                    name=f"notify-{self.name}-{i}",
+                    daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def _worker(self):
+        while True:
+            send, description, kwargs = self._queue.get()
+            try:
+                success = send(**kwargs)
+                error = None if success else "send returned False"
+            except Exception as e:
+                success = False
+                error = str(e)
+
+            with self._lock:
+                if success:
+                    self.sent += 1
+                else:
+                    self.failed += 1
+                    self.last_error = error
+                    self.last_failure_at = datetime.now().isoformat()
+
+            if success:
+                logger.info(f"✅ [{self.name}] {description}")
+            else:
+                logger.warning(f"⚠️  [{self.name}] Failed: {description} ({error})")
+
+            self._queue.task_done()
+
+
+class NotificationDispatcher:
+    """Route reminders to per-channel queues"""
+
+    def __init__(self):
+        self.channels = {
+            "email": ChannelQueue("email", settings.EMAIL_WORKERS),
+            "sms": ChannelQueue("sms", settings.SMS_WORKERS),
+        }
+
+    def submit(self, channel: str, send: Callable[..., bool], description: str, **kwargs):
+        """
+        Queue a delivery on a channel
+
+        Args:
+            channel: Channel name ("email" or "sms")
+            send: Callable performing the delivery, returns True on success
+            description: Human readable description for logs
+            **kwargs: Arguments passed to `send`
+        """
+        self.channels[channel].submit(send, description, **kwargs)
+
+    def wait_until_idle(self, timeout: Optional[float] = None) -> bool:
+        """Wait for all channels to drain; channels keep running in parallel"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        drained = True
+        for channel in self.channels.values():
+            remaining = None if deadline is None else max(0, deadline - time.monotonic())
+            drained = channel.wait_until_idle(remaining) and drained
+        return drained
+
+    def stats(self) -> dict:
+        return {name: channel.stats() for name, channel in self.channels.items()}
+
+
+# Singleton instance
+notification_dispatcher = NotificationDispatcher()
@@ -4,7 +4,7 @@ Notification Service for Document Reminders
 Supports:
 - Email notifications (Gmail SMTP / SendGrid)
 - SMS notifications (Twilio)
-- In-app notifications (future)
+- In-app notifications (see app/routers/notifications.py)
 """
 
 import smtplib
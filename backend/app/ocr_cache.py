@@ -0,0 +1,132 @@
+"""
+Caches for the OCR pipeline
+
+TTLCache is a bounded, thread-safe LRU cache with per-entry expiry and
+hit/miss counters. An optional on-disk tier (one JSON file per key)
+survives restarts and is shared by all workers on the same machine.
+
+Only derived fields (dates, document type, confidence) are ever cached -
+never images or OCR text - so the privacy guarantee still holds.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+MISSING = object()
+
+
+class TTLCache:
+    """In-process LRU + TTL cache with an optional JSON-on-disk tier"""
+
+    def __init__(self, name: str, max_entries: int, ttl_seconds: int, disk_dir: Optional[str] = None):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = disk_dir
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def get(self, key: str, default=None):
+        """Return the cached value (refreshing its LRU position) or default"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry:
+                del self._entries[key]
+
+        value = self._disk_get(key, now)
+        with self._lock:
+            if value is MISSING:
+                self.misses += 1
+                return default
+            self.disk_hits += 1
+        self._memory_set(key, value, now)
+        return value
+
+    def set(self, key: str, value):
+        """Store a JSON-serializable value"""
+        now = time.time()
+        self._memory_set(key, value, now)
+        self._disk_set(key, value, now)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "disk_tier": bool(self.disk_dir),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+            }
+
+    def _memory_set(self, key, value, now):
+        with self._lock:
+            self._entries[key] = (now + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _disk_get(self, key, now):
+        if not self.disk_dir:
+            return MISSING
+        path = self._disk_path(key)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return MISSING
+        if entry.get("expires_at", 0) <= now:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return MISSING
+        return entry.get("value")
+
+    def _disk_set(self, key, value, now):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump({"expires_at": now + self.ttl_seconds, "value": value}, f)
+            os.replace(tmp_path, path)  # Atomic - other workers never see partial files
+        except OSError:
+            return
+        self._disk_prune()
+
+    def _disk_prune(self):
+        """Keep the disk tier bounded (oldest files go first)"""
+        try:
+            files = [os.path.join(self.disk_dir, f) for f in os.listdir(self.disk_dir) if f.endswith(".json")]
+            limit = self.max_entries * 4
+            if len(files) <= limit:
+                return
+            files.sort(key=os.path.getmtime)
+            for path in files[:len(files) - limit]:
+                os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,300 @@
+"""
+Asynchronous OCR job queue
+
+POST /api/ocr/jobs hands the upload to a bounded asyncio queue and returns
+a job id at once; a fixed number of worker tasks run the OCR pipeline.
+Clients poll GET /api/ocr/jobs/{id} or follow the SSE stream.
+
+Jobs live only in the memory of the gunicorn worker that accepted them:
+the image until the job starts (OCR_JOB_QUEUE_MAX_MB caps the total held
+by queued jobs), the state and result until OCR_JOB_RESULT_TTL_SECONDS
+after it finishes. Nothing about a job is written to disk. The job id
+starts with the owning worker's id, and a poll or SSE stream that lands
+on another worker asks the owner over its Unix socket in
+OCR_JOB_SOCKET_DIR (which only holds the sockets).
+
+Jobs belong to the user who submitted them; everyone else gets None.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+import socket
+import uuid
+from typing import Dict, Optional
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ("done", "failed")
+PEER_TIMEOUT_SECONDS = 2.0  # Asking the worker that owns a job
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue is at capacity"""
+
+
+class OCRJob:
+    """One queued OCR request"""
+
+    def __init__(self, data: bytes, filename: Optional[str], content_type: Optional[str], user_id: Optional[str] = None,
+                 worker_id: str = "", upload_ms: Optional[float] = None):
+        self.id = f"{worker_id}-{uuid.uuid4().hex}"
+        self.user_id = user_id
+        self.filename = filename
+        self.content_type = content_type
+        self.upload_ms = upload_ms  # Time the router spent reading the upload
+        self.data: Optional[bytes] = data
+        self.status = "queued"
+        self.result: Optional[dict] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.changed = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+
+    def _update(self, status: str):
+        self.status = status
+        # Wake everyone waiting on this job, then arm a fresh event
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "filename": self.filename,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class OCRJobQueue:
+    """Bounded queue + worker tasks on the application's event loop"""
+
+    def __init__(self, process_document, socket_dir: Optional[str] = None):
+        """
+        Args:
+            process_document: async callable(data, filename, content_type, upload_ms) -> dict
+            socket_dir: Directory for the workers' job sockets
+        """
+        self._process_document = process_document
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers = []
+        self._jobs: Dict[str, OCRJob] = {}
+        self._queued_bytes = 0
+        self._server = None
+
+        self.worker_id = uuid.uuid4().hex[:8]
+        self.socket_dir = socket_dir or settings.OCR_JOB_SOCKET_DIR or os.path.join(tempfile.gettempdir(), "datekeeper-ocr-jobs")
+
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    async def submit(self, data: bytes, filename: Optional[str] = None, content_type: Optional[str] = None,
+                     user_id: Optional[str] = None, upload_ms: Optional[float] = None) -> OCRJob:
+        """Queue an upload; raises QueueFullError when at capacity (jobs or queued image bytes)"""
+        self._ensure_workers()
+        await self._ensure_server()
+        self._purge_expired()
+
+        if self._queued_bytes + len(data) > settings.OCR_JOB_QUEUE_MAX_MB * 1024 * 1024:
+            self.rejected += 1
+            raise QueueFullError("OCR job queue is full")
+
+        job = OCRJob(data, filename, content_type, user_id, self.worker_id, upload_ms)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise QueueFullError("OCR job queue is full")
+
+        self._jobs[job.id] = job
+        self._queued_bytes += len(data)
+        self.submitted += 1
+        return job
+
+    async def get(self, job_id: str, user_id: Optional[str] = None) -> Optional[dict]:
+        """
+        Current state of a job, from this worker or the worker that owns it
+
+        Returns:
+            The job's to_dict() plus queue_position, or None when the job is
+            unknown, expired or belongs to another user
+        """
+        owner = self._owner(job_id)
+        if owner is None or owner == self.worker_id:
+            return self._local_state(job_id, user_id)
+        return await self._ask_owner(owner, job_id, user_id)
+
+    async def wait_for_update(self, job_id: str, timeout: float):
+        """
+        Wait until a job may have changed
+
+        Jobs run by this worker wake up on their next status change (or
+        after timeout); jobs of other workers are re-read every
+        OCR_JOB_POLL_INTERVAL_SECONDS.
+        """
+        job = self._jobs.get(job_id)
+        if job is None:
+            # Run by another worker: the caller asks the owner again
+            await asyncio.sleep(min(timeout, settings.OCR_JOB_POLL_INTERVAL_SECONDS))
+            return
+        try:
+            await asyncio.wait_for(job.changed.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def queue_position(self, job: OCRJob) -> Optional[int]:
+        """Number of jobs ahead of a queued job"""
+        if job.status != "queued" or self._queue is None:
+            return None
+        for position, queued in enumerate(self._queue._queue):
+            if queued is job:
+                return position
+        return None
+
+    def stats(self) -> dict:
+        return {
+            "workers": settings.OCR_JOB_WORKERS,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "max_queue": settings.OCR_JOB_QUEUE_SIZE,
+            "queued_mb": round(self._queued_bytes / (1024 * 1024), 1),
+            "max_queued_mb": settings.OCR_JOB_QUEUE_MAX_MB,
+            "tracked_jobs": len(self._jobs),
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
+
+    async def shutdown(self):
+        """Cancel worker tasks and close the job socket (application shutdown)"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+            try:
+                os.remove(self._socket_path(self.worker_id))
+            except OSError:
+                pass
+
+    async def _ensure_server(self):
+        # Other workers ask this one about its jobs; no socket, no sharing
+        if self._server is not None or not hasattr(socket, "AF_UNIX"):
+            return
+        path = self._socket_path(self.worker_id)
+        try:
+            os.makedirs(self.socket_dir, mode=0o700, exist_ok=True)
+            self._server = await asyncio.start_unix_server(self._serve_peer, path=path)
+            os.chmod(path, 0o600)
+        except OSError as e:
+            logger.warning(f"⚠️  OCR job socket unavailable, jobs only visible to this worker: {e}")
+
+    def _ensure_workers(self):
+        # Created lazily so the queue and tasks belong to the serving loop
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=settings.OCR_JOB_QUEUE_SIZE)
+            self._workers = [
+                asyncio.create_task(self._worker(), name=f"ocr-job-{i}")
+                for i in range(settings.OCR_JOB_WORKERS)
+            ]
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: OCRJob):
+        data, job.data = job.data, None  # Don't keep the image once work starts
+        self._queued_bytes -= len(data)
+        job.started_at = time.time()
+        job._update("processing")
+        try:
+            job.result = await self._process_document(data, job.filename, job.content_type, job.upload_ms)
+            self.completed += 1
+            status = "done"
+        except Exception as e:
+            logger.error(f"❌ OCR job {job.id} failed: {e}")
+            job.error = f"OCR processing failed: {str(e)}"
+            self.failed += 1
+            status = "failed"
+        job.finished_at = time.time()
+        job._update(status)
+
+    def _local_state(self, job_id: str, user_id: Optional[str]) -> Optional[dict]:
+        self._purge_expired()
+        job = self._jobs.get(job_id)
+        if job is None or job.user_id != user_id:
+            return None
+        return {**job.to_dict(), "queue_position": self.queue_position(job)}
+
+    @staticmethod
+    def _owner(job_id: str) -> Optional[str]:
+        """Worker id a job id starts with (None for malformed ids - never a path)"""
+        worker_id, separator, _ = job_id.partition("-")
+        if not separator or not worker_id.isalnum():
+            return None
+        return worker_id
+
+    def _socket_path(self, worker_id: str) -> str:
+        return os.path.join(self.socket_dir, f"{worker_id}.sock")
+
+    async def _serve_peer(self, reader, writer):
+        """One request from another worker: {"job_id", "user_id"} -> state or null"""
+        try:
+            request = json.loads(await asyncio.wait_for(reader.readline(), PEER_TIMEOUT_SECONDS))
+            state = self._local_state(request["job_id"], request["user_id"])
+            writer.write(json.dumps(state).encode() + b"\n")
+            await writer.drain()
+        except (OSError, ValueError, KeyError, TypeError, asyncio.TimeoutError) as e:
+            logger.debug(f"Bad OCR job request from another worker: {e}")
+        finally:
+            writer.close()
+
+    async def _ask_owner(self, owner: str, job_id: str, user_id: Optional[str]) -> Optional[dict]:
+        path = self._socket_path(owner)
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_unix_connection(path), PEER_TIMEOUT_SECONDS)
+            try:
+                writer.write(json.dumps({"job_id": job_id, "user_id": user_id}).encode() + b"\n")
+                await writer.drain()
+                line = await asyncio.wait_for(reader.readline(), PEER_TIMEOUT_SECONDS)
+            finally:
+                writer.close()
+            return json.loads(line) if line else None
+        except (FileNotFoundError, ConnectionRefusedError):
+            return None  # Owner has exited, its jobs went with it
+        except (OSError, ValueError, asyncio.TimeoutError) as e:
+            logger.warning(f"⚠️  Could not reach the worker running OCR job {job_id}: {e}")
+            return None
+
+    def _purge_expired(self):
+        cutoff = time.time() - settings.OCR_JOB_RESULT_TTL_SECONDS
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
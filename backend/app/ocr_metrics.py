@@ -0,0 +1,141 @@
+"""
+Per-stage timing for the OCR pipeline
+
+`ocr_metrics.span("ocr")` times one stage: the duration goes into that
+stage's latency histogram (served by GET /api/ocr/metrics) and into the
+current document's trace. `ocr_metrics.document()` opens a trace and
+logs one structured line per document with all its stage timings, e.g.
+
+    logger.info("OCR document processed", extra={"ocr_stages": {"preprocess": 48.1, "ocr": 2310.4, ...}})
+
+so log pipelines can index the fields instead of parsing text. Per-stage
+debug lines are only built when the logger is at DEBUG.
+"""
+
+import bisect
+import contextvars
+import logging
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# upload -> preprocess / pdf_render -> ocr -> mrz -> scan (type + date candidates) -> regex -> gemini
+STAGES = ("upload", "preprocess", "pdf_render", "ocr", "mrz", "scan", "regex", "gemini", "total")
+
+# Histogram bucket upper bounds in milliseconds (last bucket is open-ended)
+BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, float('inf'))
+
+_trace: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar("ocr_trace", default=None)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (cheap to update, no samples kept)"""
+
+    def __init__(self, buckets=BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, duration_ms: float):
+        self.counts[bisect.bisect_left(self.buckets, duration_ms)] += 1
+        self.count += 1
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Upper bound of the bucket holding the given percentile"""
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return self.max_ms if bound == float('inf') else bound
+        return self.max_ms
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / self.count, 2) if self.count else None,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "max_ms": round(self.max_ms, 2),
+            "buckets": {
+                ("+Inf" if bound == float('inf') else f"<={bound}"): count
+                for bound, count in zip(self.buckets, self.counts)
+            },
+        }
+
+
+class OCRMetrics:
+    """Stage histograms plus the per-document trace"""
+
+    def __init__(self):
+        self.histograms = {stage: LatencyHistogram() for stage in STAGES}
+
+    @contextmanager
+    def span(self, stage: str, **fields):
+        """
+        Time one stage of the current document
+
+        Yields a dict holding the stage's `duration_ms` once the block ends,
+        for stages timed before the document's trace opens (see document()).
+        """
+        timing = {}
+        started = time.perf_counter()
+        try:
+            yield timing
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            timing["duration_ms"] = round(duration_ms, 2)
+            self.histograms.setdefault(stage, LatencyHistogram()).observe(duration_ms)
+
+            trace = _trace.get()
+            if trace is not None:
+                # PDF pages run the render / OCR stages once per page
+                trace[stage] = round(trace.get(stage, 0.0) + duration_ms, 2)
+
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    f"⏱️  {stage} took {duration_ms:.1f} ms",
+                    extra={"ocr_stage": stage, "duration_ms": round(duration_ms, 2), **fields}
+                )
+
+    @contextmanager
+    def document(self, stages: Optional[Dict[str, float]] = None, **fields):
+        """
+        Trace one document through the pipeline
+
+        Args:
+            stages: Timings (ms) measured before the trace opened, e.g. the
+                upload read by the router; logged but not counted in total
+
+        Yields the dict of fields that ends up in the summary log line, so
+        the pipeline can add its outcome (method, success, ...).
+        """
+        stages = dict(stages or {})
+        summary = dict(fields)
+        token = _trace.set(stages)
+        started = time.perf_counter()
+        try:
+            yield summary
+        finally:
+            _trace.reset(token)
+            total_ms = (time.perf_counter() - started) * 1000
+            self.histograms["total"].observe(total_ms)
+            stages["total"] = round(total_ms, 2)
+            logger.info(
+                f"📄 OCR document processed in {total_ms:.0f} ms",
+                extra={"ocr_stages": stages, **summary}
+            )
+
+    def stats(self) -> dict:
+        return {stage: histogram.to_dict() for stage, histogram in self.histograms.items()}
+
+
+ocr_metrics = OCRMetrics()
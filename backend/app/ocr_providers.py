@@ -0,0 +1,444 @@
+"""
+OCR provider routing
+
+Text extraction can use OCR.space, Google Cloud Vision and the optional
+local Tesseract engine. ProviderRouter tries them in order of preference
+and bounds tail latency:
+- Every call has a deadline (OCR_PROVIDER_TIMEOUT_SECONDS)
+- A circuit breaker skips a provider after repeated failures and lets a
+  single trial call through once OCR_CIRCUIT_RESET_SECONDS have passed
+- Hedging: when a call runs past the provider's observed p95 latency the
+  next provider is started too, and whichever answers first wins
+- A failed call (error, timeout, no text) fails over to the next provider;
+  only provider-side failures (timeouts, transport errors, 429/5xx) count
+  against the breaker, and a document the provider rejects as unreadable
+  fails the request without trying the others
+"""
+
+import asyncio
+import base64
+import json
+import logging
+import time
+from collections import deque
+from typing import Callable, List, Optional
+import httpx
+from app.config import settings
+from app import local_ocr
+from app.process_pool import run_in_process
+
+logger = logging.getLogger(__name__)
+
+OCRSPACE_PUBLIC_KEY = 'K87899142388957'  # Free public key (heavily rate limited)
+OCRSPACE_EXIT_PARSE_FAILED = 3  # OCRExitCode: the image itself could not be parsed
+VISION_INVALID_ARGUMENT = 3  # google.rpc.Code of a per-image error for a bad image
+VISION_UNAVAILABLE_CODES = (8, 13, 14)  # RESOURCE_EXHAUSTED, INTERNAL, UNAVAILABLE
+
+
+class ProviderUnavailable(Exception):
+    """Provider-side failure (timeout, transport error, 429/5xx) - counts against its breaker"""
+
+
+class OCRInputError(Exception):
+    """The provider rejected the document itself (corrupt / unsupported) - not retried elsewhere"""
+
+
+def _http_error(service: str, e: httpx.HTTPError) -> Exception:
+    """Exception for a failed HTTP call, classified by whose fault it is"""
+    message = f"Failed to call {service}: {str(e)}"
+    if not isinstance(e, httpx.HTTPStatusError):
+        return ProviderUnavailable(message)
+    status = e.response.status_code
+    if status == 429 or status >= 500:
+        return ProviderUnavailable(message)
+    if status in (400, 413, 415, 422):
+        return OCRInputError(message)
+    return Exception(message)  # Key / quota problems: fail over, breaker untouched
+
+
+class CircuitBreaker:
+    """Closed -> open after N consecutive failures -> half-open trial after a cool-down"""
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def available(self) -> bool:
+        """Would allow() let a call through? (doesn't claim anything)"""
+        state = self.state
+        return state == "closed" or (state == "half_open" and not self._trial_running)
+
+    def allow(self) -> bool:
+        """May a call go through? (claims the single half-open trial)"""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial_running:
+            self._trial_running = True
+            return True
+        return False
+
+    def record_success(self):
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._trial_running = False
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self._trial_running or self.consecutive_failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self._trial_running = False
+
+    def release(self):
+        """A call ended without an outcome that counts (lost hedge, bad input)"""
+        self._trial_running = False
+
+
+class OCRProvider:
+    """Base class: one way of turning an image into text"""
+
+    name = "provider"
+
+    def __init__(self):
+        self.breaker = CircuitBreaker(
+            settings.OCR_CIRCUIT_FAILURE_THRESHOLD, settings.OCR_CIRCUIT_RESET_SECONDS
+        )
+        self.latencies = deque(maxlen=200)  # Recent successful call durations
+        self.calls = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.wins = 0
+        self.input_errors = 0
+        self.last_error: Optional[str] = None
+
+    async def extract(self, image: bytes, filename: Optional[str], content_type: Optional[str]) -> str:
+        raise NotImplementedError
+
+    def p95(self) -> Optional[float]:
+        """95th percentile latency once there are enough samples"""
+        if len(self.latencies) < settings.OCR_HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    def stats(self) -> dict:
+        ordered = sorted(self.latencies)
+        return {
+            "circuit": self.breaker.state,
+            "calls": self.calls,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "wins": self.wins,
+            "input_errors": self.input_errors,
+            "p50_seconds": round(ordered[len(ordered) // 2], 3) if ordered else None,
+            "p95_seconds": round(self.p95(), 3) if self.p95() is not None else None,
+            "last_error": self.last_error,
+        }
+
+
+class OCRSpaceProvider(OCRProvider):
+    """OCR.space REST API (free tier)"""
+
+    name = "ocr_space"
+    api_url = 'https://api.ocr.space/parse/image'
+
+    def __init__(self, get_client: Callable[[], httpx.AsyncClient]):
+        super().__init__()
+        self.get_client = get_client
+        self.api_key = settings.OCRSPACE_API_KEY or OCRSPACE_PUBLIC_KEY
+
+    async def extract(self, image, filename, content_type):
+        payload = {
+            'apikey': self.api_key,
+            'language': 'eng',
+            'isOverlayRequired': False,
+            'detectOrientation': True,
+            'scale': True,
+            'OCREngine': 2,  # Engine 2 is more accurate
+        }
+        files = {
+            'file': (filename or 'document', image, content_type or 'application/octet-stream')
+        }
+
+        try:
+            response = await self.get_client().post(self.api_url, data=payload, files=files)
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            logger.warning(f"OCR.space API Error: {e}")
+            if isinstance(e, httpx.HTTPStatusError):
+                logger.debug(f"Response: {e.response.text}")
+            raise _http_error("OCR.space API", e)
+
+        result = response.json()
+
+        # Check for errors
+        if result.get('IsErroredOnProcessing'):
+            error_msg = result.get('ErrorMessage', ['Unknown error'])[0]
+            if result.get('OCRExitCode') == OCRSPACE_EXIT_PARSE_FAILED:
+                raise OCRInputError(f"OCR.space could not read the document: {error_msg}")
+            raise Exception(f"OCR.space Error: {error_msg}")
+
+        if result.get('ParsedResults'):
+            return result['ParsedResults'][0].get('ParsedText', '')
+        return ""
+
+
+class GoogleVisionProvider(OCRProvider):
+    """Google Cloud Vision DOCUMENT_TEXT_DETECTION (API key or service account)"""
+
+    name = "google_vision"
+    api_url = 'https://vision.googleapis.com/v1/images:annotate'
+    scopes = ['https://www.googleapis.com/auth/cloud-vision']
+
+    def __init__(self, get_client: Callable[[], httpx.AsyncClient]):
+        super().__init__()
+        self.get_client = get_client
+        self.api_key = settings.GOOGLE_CLOUD_API_KEY
+        self._credentials = None
+        if not self.api_key and settings.GOOGLE_APPLICATION_CREDENTIALS_JSON:
+            from google.oauth2 import service_account
+            self._credentials = service_account.Credentials.from_service_account_info(
+                json.loads(settings.GOOGLE_APPLICATION_CREDENTIALS_JSON), scopes=self.scopes
+            )
+
+    @classmethod
+    def is_configured(cls) -> bool:
+        return bool(settings.GOOGLE_CLOUD_API_KEY or settings.GOOGLE_APPLICATION_CREDENTIALS_JSON)
+
+    async def _auth(self):
+        """Query params / headers for the request"""
+        if self.api_key:
+            return {'key': self.api_key}, {}
+        if not self._credentials.valid:
+            from google.auth.transport.requests import Request
+            # Token refresh is a blocking HTTP call
+            await asyncio.to_thread(self._credentials.refresh, Request())
+        return {}, {'Authorization': f'Bearer {self._credentials.token}'}
+
+    async def extract(self, image, filename, content_type):
+        params, headers = await self._auth()
+        body = {
+            'requests': [{
+                'image': {'content': base64.b64encode(image).decode('ascii')},
+                'features': [{'type': 'DOCUMENT_TEXT_DETECTION'}],
+            }]
+        }
+
+        try:
+            response = await self.get_client().post(self.api_url, params=params, headers=headers, json=body)
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            logger.warning(f"Google Vision API Error: {e}")
+            raise _http_error("Google Vision API", e)
+
+        result = (response.json().get('responses') or [{}])[0]
+        if 'error' in result:
+            error = result['error']
+            message = f"Google Vision Error: {error.get('message', 'Unknown error')}"
+            if error.get('code') == VISION_INVALID_ARGUMENT:
+                raise OCRInputError(message)
+            if error.get('code') in VISION_UNAVAILABLE_CODES:
+                raise ProviderUnavailable(message)
+            raise Exception(message)
+        return result.get('fullTextAnnotation', {}).get('text', '')
+
+
+class LocalOCRProvider(OCRProvider):
+    """Tesseract in the shared process pool"""
+
+    name = "local"
+
+    async def extract(self, image, filename, content_type):
+        return await run_in_process(local_ocr.ocr_image, image, settings.OCR_LOCAL_LANGUAGE)
+
+
+class ProviderRouter:
+    """Ordered failover + deadlines + circuit breakers + p95 hedging"""
+
+    def __init__(self, get_client: Callable[[], httpx.AsyncClient]):
+        self.hedges = 0
+        self.hedge_wins = 0
+
+        remote = {
+            OCRSpaceProvider.name: lambda: OCRSpaceProvider(get_client),
+            GoogleVisionProvider.name: lambda: GoogleVisionProvider(get_client) if GoogleVisionProvider.is_configured() else None,
+        }
+        self.providers: List[OCRProvider] = []
+        for name in [n.strip() for n in settings.OCR_PROVIDERS.split(',') if n.strip()]:
+            if name not in remote:
+                logger.warning(f"⚠️  Unknown OCR provider '{name}' in OCR_PROVIDERS, ignoring")
+                continue
+            provider = remote[name]()
+            if provider:
+                self.providers.append(provider)
+        if not self.providers:
+            self.providers.append(OCRSpaceProvider(get_client))
+
+        # The local engine's position comes from OCR_LOCAL_ENGINE_MODE
+        self.local_mode = settings.OCR_LOCAL_ENGINE_MODE.lower()
+        if self.local_mode not in ('off', 'primary', 'fallback', 'race'):
+            logger.warning(f"⚠️  Unknown OCR_LOCAL_ENGINE_MODE '{self.local_mode}', local engine disabled")
+            self.local_mode = 'off'
+        if self.local_mode != 'off' and not local_ocr.is_available():
+            logger.warning(f"⚠️  Local OCR engine unavailable, using remote providers only")
+            self.local_mode = 'off'
+        if self.local_mode == 'primary':
+            self.providers.insert(0, LocalOCRProvider())
+        elif self.local_mode == 'race':
+            self.providers.insert(1, LocalOCRProvider())
+        elif self.local_mode == 'fallback':
+            self.providers.append(LocalOCRProvider())
+
+    @property
+    def names(self) -> List[str]:
+        return [p.name for p in self.providers]
+
+    async def extract(self, image: bytes, filename: Optional[str] = None, content_type: Optional[str] = None) -> str:
+        """
+        Extract text with the best available provider
+
+        Returns the first non-empty text. Returns "" when every provider
+        that answered found no text; raises when all of them failed, and
+        raises OCRInputError as soon as one rejects the document.
+        """
+        # Breakers are only claimed when a provider is actually launched: a
+        # half-open trial claimed up front would never be released if an
+        # earlier provider answered first
+        queue = [p for p in self.providers if p.breaker.available()]
+        running = {}  # task -> (provider, started_at, holds_trial)
+        hedged = False
+        errors = []
+        empty = False
+
+        def launch() -> Optional[OCRProvider]:
+            while queue:
+                provider = queue.pop(0)
+                holds_trial = provider.breaker.state == "half_open"
+                if not provider.breaker.allow():
+                    continue  # Another request took the half-open trial meanwhile
+                task = asyncio.create_task(self._call(provider, image, filename, content_type))
+                running[task] = (provider, time.monotonic(), holds_trial)
+                return provider
+            return None
+
+        first = launch()
+        if first is None:
+            raise Exception("All OCR providers are temporarily unavailable (circuit open)")
+        try:
+            while running:
+                delay = self._hedge_delay(running, queue)
+                done = set()
+                if delay != 0:
+                    done, _ = await asyncio.wait(running, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # Slow call (or race mode) - hedge with the next provider
+                    hedge = launch()
+                    if hedge:
+                        self.hedges += 1
+                        hedged = True
+                        reason = "racing" if delay == 0 else "past its p95 latency"
+                        logger.info(f"⏱️  {first.name} is {reason}, hedging with {hedge.name}")
+                    continue
+
+                for task in done:
+                    provider, _, _ = running.pop(task)
+                    if isinstance(task.exception(), OCRInputError):
+                        raise task.exception()
+                    if task.exception():
+                        errors.append(f"{provider.name}: {task.exception()}")
+                    elif task.result().strip():
+                        provider.wins += 1
+                        if hedged and provider is not first:
+                            self.hedge_wins += 1
+                        return task.result()
+                    else:
+                        empty = True
+
+                # Everything in flight failed or found no text - fail over
+                if not running and queue:
+                    launch()
+        finally:
+            for task, (provider, _, holds_trial) in running.items():
+                task.cancel()
+                if holds_trial:
+                    provider.breaker.release()
+
+        if empty:
+            return ""
+        raise Exception("All OCR providers failed: " + "; ".join(errors))
+
+    async def _call(self, provider: OCRProvider, image, filename, content_type) -> str:
+        """
+        One provider call with a deadline, feeding its breaker and latency stats
+
+        Only ProviderUnavailable failures (and timeouts) count against the
+        breaker; other errors just give back a half-open trial.
+        """
+        provider.calls += 1
+        started = time.monotonic()
+        try:
+            text = await asyncio.wait_for(
+                provider.extract(image, filename, content_type),
+                timeout=settings.OCR_PROVIDER_TIMEOUT_SECONDS
+            )
+        except asyncio.TimeoutError:
+            provider.timeouts += 1
+            provider.failures += 1
+            provider.last_error = f"Timed out after {settings.OCR_PROVIDER_TIMEOUT_SECONDS}s"
+            provider.breaker.record_failure()
+            raise Exception(provider.last_error)
+        except asyncio.CancelledError:
+            raise
+        except OCRInputError as e:
+            provider.input_errors += 1
+            provider.last_error = str(e)
+            provider.breaker.release()
+            raise
+        except ProviderUnavailable as e:
+            provider.failures += 1
+            provider.last_error = str(e)
+            provider.breaker.record_failure()
+            raise
+        except Exception as e:
+            provider.failures += 1
+            provider.last_error = str(e)
+            provider.breaker.release()
+            raise
+        provider.latencies.append(time.monotonic() - started)
+        provider.breaker.record_success()
+        return text
+
+    def _hedge_delay(self, running, queue) -> Optional[float]:
+        """Seconds until the next provider should be started (None = don't hedge)"""
+        if not queue or len(running) != 1:
+            return None
+        provider, started, _ = next(iter(running.values()))
+        # Race mode: the local engine always runs alongside the first remote call
+        if self.local_mode == 'race' and 'local' in (provider.name, queue[0].name):
+            return 0
+        if not settings.OCR_HEDGE_ENABLED:
+            return None
+        p95 = provider.p95()
+        if p95 is None:
+            return None
+        return max(0.0, started + p95 - time.monotonic())
+
+    def stats(self) -> dict:
+        return {
+            "order": self.names,
+            "local_engine_mode": self.local_mode,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "providers": {p.name: p.stats() for p in self.providers},
+        }
@@ -1,82 +1,257 @@
-import io
-import re
+import asyncio
+import hashlib
+import json
+import logging
+import time
 from datetime import datetime
-from dateutil import parser
 import os
-import requests
+import httpx
 from app.config import settings
+from app.image_preprocess import preprocess_image
+from app.ocr_cache import TTLCache, MISSING
+from app.text_scanner import scan_document, rank_candidates, ranked_confidence, expiry_conflict, date_excerpt
+from app.mrz import parse_mrz
+from app import pdf_pages
+from app.ocr_providers import ProviderRouter
+from app.process_pool import run_in_process
+from app.ocr_metrics import ocr_metrics
+
+logger = logging.getLogger(__name__)
+
+# Confidence reported for Gemini answers (check-digit-validated MRZ is 1.0)
+GEMINI_CONFIDENCE = 0.75
+GEMINI_AGREEMENT_CONFIDENCE = 0.9  # Gemini picked one of the scanner's candidates
+
+# Prompt-size buckets (characters) for the Gemini latency breakdown
+GEMINI_PROMPT_BUCKETS = (500, 1000, 2000, 4000, float('inf'))
+
+class GeminiCoalescer:
+    """
+    Collects unsure texts from concurrent documents into batched Gemini calls
+    
+    The first unsure text opens a GEMINI_BATCH_WINDOW_SECONDS window; the
+    batch is sent when the window closes or GEMINI_BATCH_SIZE texts are
+    waiting, whichever comes first.
+    """
+    
+    def __init__(self, service):
+        self._service = service
+        self._pending = []  # (text, scan, future)
+        self._window = None  # TimerHandle closing the open batch window
+        self._deliveries = set()  # Running _deliver tasks (kept so they aren't garbage-collected)
+    
+    async def extract(self, text, scan=None):
+        """(date, confidence, method) for one text, batched with its neighbours"""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((text, scan, future))
+        if len(self._pending) >= settings.GEMINI_BATCH_SIZE:
+            self._flush()
+        elif len(self._pending) == 1:
+            # First text opens a batch window
+            self._window = asyncio.get_running_loop().call_later(settings.GEMINI_BATCH_WINDOW_SECONDS, self._flush)
+        return await future
+    
+    def _flush(self):
+        # A size-triggered flush closes the window; its timer must not cut the next one short
+        if self._window is not None:
+            self._window.cancel()
+            self._window = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._deliver(batch))
+            self._deliveries.add(task)
+            task.add_done_callback(self._deliveries.discard)
+    
+    async def _deliver(self, batch):
+        try:
+            results = await self._service.extract_expiry_batch_async(
+                [text for text, _, _ in batch], [scan for _, scan, _ in batch]
+            )
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, _, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
 
 class OCRService:
     
     def __init__(self):
-        """Initialize OCR service with OCR.space API and optional Gemini"""
-        self.api_key = settings.OCRSPACE_API_KEY or 'K87899142388957'  # Free public key
-        self.api_url = 'https://api.ocr.space/parse/image'
+        """Initialize OCR service with its OCR providers and optional Gemini"""
         self.gemini_key = settings.GEMINI_API_KEY
-        print(f"Using OCR.space API for text extraction")
+        self._http_clients = {}  # event loop -> pooled httpx.AsyncClient
+        self.result_cache = TTLCache(
+            "ocr_results",
+            max_entries=settings.OCR_RESULT_CACHE_SIZE,
+            ttl_seconds=settings.OCR_RESULT_CACHE_TTL_SECONDS,
+            disk_dir=settings.OCR_RESULT_CACHE_DIR
+        )
+        self.gemini_cache = TTLCache(
+            "gemini",
+            max_entries=settings.GEMINI_CACHE_SIZE,
+            ttl_seconds=settings.GEMINI_CACHE_TTL_SECONDS
+        )
+        self.gemini_calls = 0
+        self.gemini_latency_total = 0.0
+        self.gemini_saved_seconds = 0.0
+        self.gemini_source_chars = 0  # OCR text length before windowing
+        self.gemini_prompt_chars = 0  # Excerpt length actually sent
+        self.gemini_answers = 0
+        self.gemini_no_answer = 0
+        self.gemini_agreed = 0  # Answer was one of the scanner's candidates
+        self.gemini_latency_by_prompt = {}  # "<=N" chars -> [calls, total seconds]
+        self.gemini_batch_calls = 0
+        self.gemini_batched_texts = 0
+        self.gemini_invalid_entries = 0  # Batch entries missing/invalid -> regex fallback
+        self.gemini_batch_failures = 0  # Whole batched calls that failed -> regex fallback
+        self._gemini_coalescer = GeminiCoalescer(self)
+        self.mrz_hits = 0
+        self.gemini_skips = 0  # Confident regex answers that didn't need Gemini
+        # Text extraction: OCR.space / Google Vision / local engine
+        self.ocr_router = ProviderRouter(lambda: self._get_http_client())
+        self.local_engine_mode = self.ocr_router.local_mode
+        logger.info(f"OCR providers: {' -> '.join(self.ocr_router.names)}")
         if self.gemini_key:
-            print(f"✨ Gemini AI enabled for intelligent date extraction")
+            logger.info(f"✨ Gemini AI enabled for intelligent date extraction")
     
-    def extract_document_text(self, image_path):
-        """Extract text from document using OCR.space"""
+    def _get_http_client(self):
+        """
+        Shared, pooled async HTTP client (keep-alive across requests)
+        
+        An AsyncClient's connections belong to the event loop they were
+        opened on, so there is one client per loop, closed on that loop
+        when it shuts down (see _close_with_loop) or by aclose().
+        """
+        loop = asyncio.get_running_loop()
+        entry = self._http_clients.get(loop)
+        if entry is None:
+            client = httpx.AsyncClient(
+                timeout=httpx.Timeout(settings.OCR_HTTP_TIMEOUT_SECONDS, connect=10.0),
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10)
+            )
+            closer = self._close_with_loop(loop, client)
+            # Starting the generator registers it with this loop's shutdown_asyncgens()
+            loop.create_task(closer.__anext__())
+            entry = self._http_clients[loop] = (client, closer)
+        return entry[0]
+    
+    async def _close_with_loop(self, loop, client):
+        """Parked until the loop shuts down (asyncio.run, uvicorn), then closes the client there"""
         try:
-            with open(image_path, 'rb') as image_file:
-                # Prepare request
-                payload = {
-                    'apikey': self.api_key,
-                    'language': 'eng',
-                    'isOverlayRequired': False,
-                    'detectOrientation': True,
-                    'scale': True,
-                    'OCREngine': 2,  # Engine 2 is more accurate
-                }
-                
-                files = {
-                    'file': image_file
-                }
-                
-                # Make request
-                response = requests.post(self.api_url, data=payload, files=files)
-                response.raise_for_status()
-                
-                result = response.json()
-                
-                # Check for errors
-                if result.get('IsErroredOnProcessing'):
-                    error_msg = result.get('ErrorMessage', ['Unknown error'])[0]
-                    raise Exception(f"OCR.space Error: {error_msg}")
-                
-                # Extract text
-                if result.get('ParsedResults') and len(result['ParsedResults']) > 0:
-                    text = result['ParsedResults'][0].get('ParsedText', '')
-                    return text
-                
-                return ""
-                
-        except requests.exceptions.RequestException as e:
-            print(f"OCR.space API Error: {e}")
-            if hasattr(e, 'response') and e.response is not None:
-                print(f"Response: {e.response.text}")
-            raise Exception(f"Failed to call OCR.space API: {str(e)}")
+            yield
+        finally:
+            if self._http_clients.get(loop, (None,))[0] is client:
+                del self._http_clients[loop]
+            await client.aclose()
+    
+    async def aclose(self):
+        """Close the pooled HTTP clients of every event loop (application shutdown)"""
+        current_loop = asyncio.get_running_loop()
+        clients, self._http_clients = self._http_clients, {}
+        for loop, (client, _) in clients.items():
+            if loop is current_loop:
+                await client.aclose()
+            elif loop.is_running():
+                await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(client.aclose(), loop))
+    
+    def _run_sync(self, coro):
+        """Run part of the async pipeline from blocking code (scripts, CLI)"""
+        async def runner():
+            try:
+                return await coro
+            finally:
+                await self.aclose()
+        return asyncio.run(runner())
+    
+    async def extract_document_text_async(self, image, filename=None, content_type=None):
+        """
+        Extract text from document via the OCR provider router
+        
+        `image` may be raw bytes, a file-like object or a path (kept for
+        scripts). Providers are tried in order with per-call deadlines,
+        circuit breakers and p95 hedging (see app/ocr_providers.py).
+        """
+        if isinstance(image, (str, os.PathLike)):
+            filename = filename or os.path.basename(image)
+        image = self._read_image_bytes(image)
+        
+        try:
+            with ocr_metrics.span("ocr", ocr_bytes=len(image)):
+                return await self.ocr_router.extract(image, filename, content_type)
         except Exception as e:
-            print(f"OCR Error: {e}")
+            logger.error(f"OCR Error: {e}")
             raise
     
-    def extract_text_from_image(self, image_path):
-        """Extract text using OCR.space (same as extract_document_text)"""
-        return self.extract_document_text(image_path)
+    def extract_document_text(self, image, filename=None, content_type=None):
+        """Blocking wrapper around extract_document_text_async"""
+        return self._run_sync(self.extract_document_text_async(image, filename, content_type))
     
-    def extract_expiry_with_gemini(self, text):
-        """Use Gemini AI to intelligently extract expiry date"""
+    def extract_text_from_image(self, image, filename=None, content_type=None):
+        """Extract text from an image (same as extract_document_text)"""
+        return self.extract_document_text(image, filename, content_type)
+    
+    def _gemini_cache_key(self, text):
+        """Hash of whitespace- and case-normalized OCR text"""
+        normalized = ' '.join(text.lower().split())
+        return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+    
+    async def extract_expiry_with_gemini_async(self, text):
+        """
+        Use Gemini AI to intelligently extract expiry date
+        
+        Only the lines around dates and expiry labels are sent, up to
+        GEMINI_PROMPT_CHAR_BUDGET characters. Answers are cached by the
+        normalized excerpt, so templates and re-scans of the same card skip
+        the Gemini round trip.
+        """
         if not self.gemini_key:
             return None
         
+        excerpt = date_excerpt(text, settings.GEMINI_PROMPT_CHAR_BUDGET, settings.GEMINI_PROMPT_CONTEXT_LINES)
+        cache_key = self._gemini_cache_key(excerpt)
+        cached = self.gemini_cache.get(cache_key, MISSING)
+        if cached is not MISSING:
+            self.gemini_saved_seconds += cached["latency"]
+            logger.debug(f"⚡ Gemini cache hit: {cached['expiry_date'] or 'NONE'}")
+            return cached["expiry_date"]
+        
         try:
-            print(f"\n🤖 Using Gemini AI for intelligent extraction...")
-            
-            url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-pro:generateContent?key={self.gemini_key}"
-            
-            prompt = f"""You are an expert at extracting information from identity documents.
+            started = time.perf_counter()
+            with ocr_metrics.span("gemini", gemini_prompt_chars=len(excerpt)):
+                expiry_date = await self._call_gemini(excerpt)
+            latency = time.perf_counter() - started
+        except Exception as e:
+            logger.warning(f"Gemini extraction failed: {e}")
+            return None
+        
+        self.gemini_calls += 1
+        self.gemini_latency_total += latency
+        self._record_gemini_prompt(len(text), len(excerpt), latency)
+        # "NONE" answers are cached too - the same text gives the same answer
+        self.gemini_cache.set(cache_key, {"expiry_date": expiry_date, "latency": round(latency, 3)})
+        return expiry_date
+    
+    def _record_gemini_prompt(self, source_chars, prompt_chars, latency):
+        """Prompt size / latency counters for tuning the budget"""
+        self.gemini_source_chars += source_chars
+        self.gemini_prompt_chars += prompt_chars
+        for limit in GEMINI_PROMPT_BUCKETS:
+            if prompt_chars <= limit:
+                break
+        bucket = self.gemini_latency_by_prompt.setdefault(f"<={limit}", [0, 0.0])
+        bucket[0] += 1
+        bucket[1] += latency
+    
+    async def _call_gemini(self, text):
+        """Single Gemini request; raises on transport/API errors"""
+        logger.debug(f"🤖 Using Gemini AI for intelligent extraction...")
+        
+        url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-pro:generateContent?key={self.gemini_key}"
+        
+        prompt = f"""You are an expert at extracting information from identity documents.
 
 Given this OCR text from a passport/ID/license, extract ONLY the expiry date.
 
@@ -96,197 +271,563 @@ Examples:
 
 Return ONLY the date in YYYY-MM-DD format or "NONE". No explanation."""
 
-            payload = {
-                "contents": [{
-                    "parts": [{"text": prompt}]
-                }],
-                "generationConfig": {
-                    "temperature": 0.1,
-                    "maxOutputTokens": 50
-                }
+        payload = {
+            "contents": [{
+                "parts": [{"text": prompt}]
+            }],
+            "generationConfig": {
+                "temperature": 0.1,
+                "maxOutputTokens": 50
             }
+        }
+        
+        response = await self._get_http_client().post(url, json=payload)
+        response.raise_for_status()
+        
+        result = response.json()
+        
+        if 'candidates' in result and len(result['candidates']) > 0:
+            extracted = result['candidates'][0]['content']['parts'][0]['text'].strip()
+            logger.debug(f"Gemini extracted: {extracted}")
             
-            response = requests.post(url, json=payload)
-            response.raise_for_status()
-            
-            result = response.json()
-            
-            if 'candidates' in result and len(result['candidates']) > 0:
-                extracted = result['candidates'][0]['content']['parts'][0]['text'].strip()
-                print(f"Gemini extracted: {extracted}")
-                
-                if extracted and extracted != "NONE":
-                    # Validate it's a proper date
-                    try:
-                        parsed = datetime.strptime(extracted, '%Y-%m-%d')
-                        print(f"✓ Valid date: {parsed.date()}")
-                        return extracted
-                    except:
-                        print(f"✗ Invalid date format from Gemini")
-                        return None
-            
-            return None
-            
-        except Exception as e:
-            print(f"Gemini extraction failed: {e}")
-            return None
+            if extracted and extracted != "NONE":
+                # Validate it's a proper date
+                try:
+                    parsed = datetime.strptime(extracted, '%Y-%m-%d')
+                    logger.debug(f"✓ Valid date: {parsed.date()}")
+                    return extracted
+                except:
+                    logger.warning(f"✗ Invalid date format from Gemini")
+                    return None
+        
+        return None
+    
+    async def _call_gemini_batch(self, texts):
+        """
+        One Gemini request for several OCR excerpts
+        
+        Returns:
+            dict: entry id -> 'YYYY-MM-DD' or None, for the valid entries only
+        """
+        logger.debug(f"🤖 Using Gemini AI for {len(texts)} documents in one request...")
+        
+        url = f"https://generativelanguage.googleapis.com/v1beta/models/{settings.GEMINI_BATCH_MODEL}:generateContent?key={self.gemini_key}"
+        
+        documents = "\n\n".join(f"### Document {i}\n{text}" for i, text in enumerate(texts))
+        prompt = f"""You are an expert at extracting information from identity documents.
 
-    def extract_expiry_date(self, text):
-        """Extract expiry date from OCR text with multiple patterns"""
+Below are {len(texts)} OCR texts from passports, IDs, licenses and similar documents, each introduced by "### Document <id>".
+
+For EVERY document return one object with its "id" and its "expiry_date":
+1. The expiry date (look for: "expiry", "expires", "valid until", "date of expiry", etc.) in YYYY-MM-DD format
+2. Not the birth date or issue date
+3. null if the document has no expiry date
+
+{documents}"""
+
+        payload = {
+            "contents": [{
+                "parts": [{"text": prompt}]
+            }],
+            "generationConfig": {
+                "temperature": 0.1,
+                "responseMimeType": "application/json",
+                "responseSchema": {
+                    "type": "ARRAY",
+                    "items": {
+                        "type": "OBJECT",
+                        "properties": {
+                            "id": {"type": "INTEGER"},
+                            "expiry_date": {"type": "STRING", "nullable": True}
+                        },
+                        "required": ["id", "expiry_date"]
+                    }
+                }
+            }
+        }
         
-        # Try Gemini first if available
-        if self.gemini_key:
-            gemini_date = self.extract_expiry_with_gemini(text)
-            if gemini_date:
-                return gemini_date
-            print("Gemini couldn't extract, falling back to regex patterns...")
-        
-        print(f"\n=== Date Extraction Debug ===")
-        print(f"Extracted text length: {len(text)} characters")
-        print(f"First 200 chars: {text[:200]}")
-        
-        # Comprehensive date patterns
-        patterns = [
-            # Explicit expiry mentions with various formats
-            (r'expir[ye].*?date.*?[:\s]*(\d{1,2}[/.\-]\d{1,2}[/.\-]\d{2,4})', 'Expiry date with slash/dot/dash'),
-            (r'expir[ye].*?[:\s]*(\d{1,2}[/.\-]\d{1,2}[/.\-]\d{2,4})', 'Expiry with slash/dot/dash'),
-            (r'exp.*?date.*?[:\s]*(\d{1,2}[/.\-]\d{1,2}[/.\-]\d{2,4})', 'Exp date'),
-            (r'valid.*?until.*?[:\s]*(\d{1,2}[/.\-]\d{1,2}[/.\-]\d{2,4})', 'Valid until'),
-            (r'valid.*?thru.*?[:\s]*(\d{1,2}[/.\-]\d{1,2}[/.\-]\d{2,4})', 'Valid thru'),
-            (r'date.*?of.*?expiry.*?[:\s]*(\d{1,2}[/.\-]\d{1,2}[/.\-]\d{2,4})', 'Date of expiry'),
-            
-            # Date formats with month names
-            (r'(\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{4})', 'DD Mon YYYY'),
-            (r'((?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{1,2},?\s+\d{4})', 'Mon DD, YYYY'),
-            
-            # Numeric date formats
-            (r'(\d{1,2}[/.\-]\d{1,2}[/.\-]\d{4})', 'DD/MM/YYYY or MM/DD/YYYY'),
-            (r'(\d{4}[/.\-]\d{1,2}[/.\-]\d{1,2})', 'YYYY-MM-DD'),
-            (r'(\d{2}\s+\d{2}\s+\d{4})', 'DD MM YYYY with spaces'),
-            
-            # Compact formats
-            (r'(\d{8})', 'DDMMYYYY or YYYYMMDD'),
-        ]
+        response = await self._get_http_client().post(url, json=payload)
+        response.raise_for_status()
         
-        dates_found = []
+        result = response.json()
+        entries = json.loads(result['candidates'][0]['content']['parts'][0]['text'])
+        if not isinstance(entries, list):
+            raise ValueError("Gemini batch response is not a list")
         
-        for pattern, description in patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
-                try:
-                    date_str = match.group(1) if match.lastindex else match.group(0)
-                    print(f"Found potential date: '{date_str}' using pattern: {description}")
-                    
-                    # Try to parse date
-                    parsed_date = None
-                    
-                    # Handle compact format (8 digits)
-                    if len(date_str) == 8 and date_str.isdigit():
-                        # Try DDMMYYYY
-                        try:
-                            parsed_date = datetime.strptime(date_str, '%d%m%Y')
-                        except:
-                            pass
-                        # Try YYYYMMDD
-                        if not parsed_date:
-                            try:
-                                parsed_date = datetime.strptime(date_str, '%Y%m%d')
-                            except:
-                                pass
-                    else:
-                        # Use dateutil parser for other formats
-                        parsed_date = parser.parse(date_str, fuzzy=True, dayfirst=True)
-                    
-                    if parsed_date:
-                        # Accept dates from 5 years ago to 10 years in future
-                        # This allows tracking expired documents too
-                        today = datetime.now().date()
-                        date_diff = (parsed_date.date() - today).days
-                        
-                        # Accept dates from 5 years ago to 10 years in future
-                        if -1825 <= date_diff <= 3650:  # 5 years ago to 10 years future
-                            print(f"  ✓ Parsed as: {parsed_date.date()} (in {date_diff} days)")
-                            dates_found.append((parsed_date, date_diff))
-                        else:
-                            print(f"  ✗ Date out of range: {parsed_date.date()} (too old or too far in future)")
-                except Exception as e:
-                    print(f"  ✗ Failed to parse: {e}")
-                    continue
+        answers = {}
+        for entry in entries:
+            if not isinstance(entry, dict) or not isinstance(entry.get('id'), int):
+                continue
+            entry_id, expiry_date = entry['id'], entry.get('expiry_date')
+            if not 0 <= entry_id < len(texts) or entry_id in answers:
+                continue
+            if expiry_date in (None, '', 'NONE'):
+                answers[entry_id] = None
+                continue
+            try:
+                datetime.strptime(expiry_date, '%Y-%m-%d')
+            except (TypeError, ValueError):
+                logger.warning(f"✗ Invalid date format from Gemini for document {entry_id}: {expiry_date!r}")
+                continue
+            answers[entry_id] = expiry_date
         
-        print(f"\nTotal dates found: {len(dates_found)}")
+        logger.debug(f"Gemini answered {len(answers)}/{len(texts)} documents")
+        return answers
+    
+    def extract_expiry_with_gemini(self, text):
+        """Blocking wrapper around extract_expiry_with_gemini_async"""
+        return self._run_sync(self.extract_expiry_with_gemini_async(text))
+    
+    async def extract_expiry_async(self, text, scan=None):
+        """
+        Extract expiry date from OCR text with a confidence score
         
-        if dates_found:
-            # Sort by date (most recent first)
-            # For expired docs, we want the most recent expiry
-            # For valid docs, we want the nearest future expiry
-            dates_found.sort(key=lambda x: x[0], reverse=True)
-            
-            # Prefer dates that are in the future or recently expired
-            future_dates = [d for d in dates_found if d[1] >= 0]
-            recent_past = [d for d in dates_found if -730 <= d[1] < 0]  # Last 2 years
-            
-            if future_dates:
-                best_date = future_dates[-1][0]  # Earliest future date
-                print(f"Selected future date: {best_date.date()}")
-            elif recent_past:
-                best_date = recent_past[0][0]  # Most recent past date
-                print(f"Selected recent expiry date: {best_date.date()}")
+        Regex candidates are scored locally first (microseconds). Gemini
+        is only asked when the best local answer scores below
+        OCR_CONFIDENCE_THRESHOLD.
+        
+        Args:
+            text: OCR text
+            scan: scan_document(text) result, when the caller already has it
+        
+        Returns:
+            tuple: (date 'YYYY-MM-DD' or None, confidence 0-1, method)
+        """
+        regex = self._regex_expiry(text, scan)
+        confident = self._confident_regex(regex)
+        if confident:
+            return confident
+        
+        gemini_date = await self.extract_expiry_with_gemini_async(text)
+        return self._combine_with_gemini(gemini_date, regex)
+    
+    def _regex_is_certain(self, regex):
+        """Confident enough to skip Gemini (never when an expiry label looks misplaced)"""
+        regex_date, regex_confidence, ranked = regex
+        return bool(regex_date) and regex_confidence >= settings.OCR_CONFIDENCE_THRESHOLD and not expiry_conflict(ranked)
+    
+    def _confident_regex(self, regex):
+        """The regex answer when Gemini isn't needed (confident, or no key), else None"""
+        regex_date, regex_confidence, _ = regex
+        if self._regex_is_certain(regex):
+            self.gemini_skips += 1
+            logger.debug(f"🎯 Confident regex match ({regex_confidence}), skipping Gemini")
+            return regex_date, regex_confidence, "regex"
+        if not self.gemini_key:
+            return regex_date, regex_confidence, "regex"
+        return None
+    
+    def _combine_with_gemini(self, gemini_date, regex):
+        """Final (date, confidence, method) from a Gemini answer and the regex result"""
+        regex_date, regex_confidence, ranked = regex
+        if gemini_date:
+            self.gemini_answers += 1
+            # Gemini agreeing with a local candidate is worth more than either alone
+            scores = {c.date.strftime('%Y-%m-%d'): score for c, score in ranked}
+            if gemini_date in scores:
+                self.gemini_agreed += 1
+                confidence = max(GEMINI_AGREEMENT_CONFIDENCE, scores[gemini_date])
             else:
-                best_date = dates_found[0][0]  # Most recent date overall
-                print(f"Selected most recent date: {best_date.date()}")
+                confidence = GEMINI_CONFIDENCE
+            return gemini_date, confidence, "gemini"
+        
+        self.gemini_no_answer += 1
+        logger.debug("Gemini couldn't extract, falling back to regex patterns...")
+        return regex_date, regex_confidence, "regex"
+    
+    async def extract_expiry_batch_async(self, texts, scans=None):
+        """
+        Extract expiry dates for several OCR texts at once
+        
+        Confident regex answers and cached Gemini answers are used as-is;
+        the rest are packed GEMINI_BATCH_SIZE at a time into one Gemini
+        request with a JSON response schema. Entries Gemini leaves out or
+        answers with an invalid date fall back to that text's regex result.
+        
+        Args:
+            texts: OCR texts
+            scans: Matching scan_document() results (optional)
+        
+        Returns:
+            list: (date 'YYYY-MM-DD' or None, confidence 0-1, method) per text
+        """
+        results = [None] * len(texts)
+        unsure = []  # (index, source chars, excerpt, cache key, regex result)
+        scans = scans or [None] * len(texts)
+        
+        for index, (text, scan) in enumerate(zip(texts, scans)):
+            regex = self._regex_expiry(text, scan)
+            confident = self._confident_regex(regex)
+            if confident:
+                results[index] = confident
+                continue
             
-            return best_date.strftime('%Y-%m-%d')
+            excerpt = date_excerpt(text, settings.GEMINI_PROMPT_CHAR_BUDGET, settings.GEMINI_PROMPT_CONTEXT_LINES)
+            cache_key = self._gemini_cache_key(excerpt)
+            cached = self.gemini_cache.get(cache_key, MISSING)
+            if cached is not MISSING:
+                self.gemini_saved_seconds += cached["latency"]
+                results[index] = self._combine_with_gemini(cached["expiry_date"], regex)
+                continue
+            unsure.append((index, len(text), excerpt, cache_key, regex))
         
-        print("No valid dates found")
-        return None
+        chunks = [
+            unsure[start:start + settings.GEMINI_BATCH_SIZE]
+            for start in range(0, len(unsure), settings.GEMINI_BATCH_SIZE)
+        ]
+        await asyncio.gather(*(self._extract_gemini_chunk(chunk, results) for chunk in chunks))
+        return results
     
-    def detect_document_type(self, text):
-        """Detect document type from text"""
-        
-        text_lower = text.lower()
-        
-        if any(word in text_lower for word in ['passport', 'passeport', 'pasaporte']):
-            return 'passport'
-        elif any(word in text_lower for word in ['driving', 'driver', 'license', 'licence']):
-            return 'driving_license'
-        elif any(word in text_lower for word in ['identity', 'national id', 'citizen']):
-            return 'national_id'
-        elif any(word in text_lower for word in ['visa']):
-            return 'visa'
+    async def _extract_gemini_chunk(self, chunk, results):
+        """One batched Gemini call; fills `results` for every entry of the chunk"""
+        try:
+            started = time.perf_counter()
+            with ocr_metrics.span("gemini", gemini_batch_size=len(chunk)):
+                answers = await self._call_gemini_batch([excerpt for _, _, excerpt, _, _ in chunk])
+            latency = time.perf_counter() - started
+        except Exception as e:
+            logger.warning(f"Batched Gemini extraction failed: {e}")
+            self.gemini_batch_failures += 1
+            answers, latency = {}, None
+        
+        if latency is not None:
+            self.gemini_calls += 1
+            self.gemini_batch_calls += 1
+            self.gemini_batched_texts += len(chunk)
+            self.gemini_latency_total += latency
+            self._record_gemini_prompt(
+                sum(source for _, source, _, _, _ in chunk),
+                sum(len(excerpt) for _, _, excerpt, _, _ in chunk),
+                latency
+            )
+        
+        for entry_id, (index, _, _, cache_key, regex) in enumerate(chunk):
+            if entry_id in answers:
+                expiry_date = answers[entry_id]
+                self.gemini_cache.set(cache_key, {
+                    "expiry_date": expiry_date, "latency": round(latency / len(chunk), 3)
+                })
+            else:
+                if latency is not None:
+                    self.gemini_invalid_entries += 1  # Answered, but not for this entry
+                expiry_date = None
+            results[index] = self._combine_with_gemini(expiry_date, regex)
+    
+    async def extract_expiry_date_async(self, text):
+        """Extract expiry date from OCR text (scored regex, Gemini when unsure)"""
+        expiry_date, _, _ = await self.extract_expiry_async(text)
+        return expiry_date
+    
+    def extract_expiry_date(self, text):
+        """Blocking wrapper around extract_expiry_date_async"""
+        return self._run_sync(self.extract_expiry_date_async(text))
+    
+    def extract_expiry_date_regex(self, text):
+        """Extract expiry date from OCR text with the date scanner"""
+        expiry_date, _, _ = self._regex_expiry(text)
+        return expiry_date
+    
+    def _regex_expiry(self, text, scan=None):
+        """
+        Best scored date candidate (scans the text unless `scan` is given)
+        
+        Returns:
+            tuple: (date 'YYYY-MM-DD' or None, confidence, ranked candidates)
+        """
+        
+        if scan is None:
+            with ocr_metrics.span("scan"):
+                scan = scan_document(text)
+        
+        with ocr_metrics.span("regex"):
+            ranked = rank_candidates(scan.dates)
+            confidence = ranked_confidence(ranked)
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            self._log_candidates(scan.dates, ranked)
+        
+        if not ranked:
+            return None, 0.0, ranked
+        return ranked[0][0].date.strftime('%Y-%m-%d'), confidence, ranked
+    
+    def _log_candidates(self, candidates, ranked):
+        """Date extraction debug output (only built at DEBUG level)"""
+        scores = {id(c): score for c, score in ranked}
+        lines = [f"=== Date Extraction Debug === ({len(candidates)} candidates)"]
+        for candidate in candidates:
+            label = f" near '{candidate.label}' label" if candidate.label else ""
+            if id(candidate) in scores:
+                outcome = f"✓ {candidate.date} (score {scores[id(candidate)]})"
+            else:
+                outcome = f"✗ {candidate.date} out of range (too old or too far in future)"
+            lines.append(f"  '{candidate.text}' ({candidate.format}){label}: {outcome}")
+        if ranked:
+            lines.append(f"Selected date: {ranked[0][0].date} (confidence {ranked_confidence(ranked)})")
         else:
-            return 'other'
+            lines.append("No valid dates found")
+        logger.debug("\n".join(lines))
+    
+    def detect_document_type(self, text):
+        """Detect document type from text (multilingual keywords, see text_scanner)"""
+        return scan_document(text).document_type
+    
+    def _read_image_bytes(self, image):
+        """Load bytes from raw bytes, a file-like object or a path"""
+        if isinstance(image, (bytes, bytearray, memoryview)):
+            return bytes(image)
+        if hasattr(image, 'read'):
+            return image.read()
+        with open(image, 'rb') as image_file:
+            return image_file.read()
+    
+    async def preprocess_image_async(self, image_data):
+        """
+        Shrink the image before upload (EXIF fix, grayscale, downscale)
+        
+        Runs in the shared process pool. Returns (bytes, content_type);
+        content_type is None when the original bytes are kept.
+        """
+        with ocr_metrics.span("preprocess", ocr_bytes=len(image_data)):
+            processed, content_type = await run_in_process(
+                preprocess_image,
+                image_data,
+                settings.OCR_MAX_IMAGE_SIDE,
+                settings.OCR_JPEG_QUALITY
+            )
+        if content_type:
+            logger.debug(f"🗜️  Preprocessed image: {len(image_data) // 1024} KB → {len(processed) // 1024} KB")
+        return processed, content_type
+    
+    async def extract_pdf_text_async(self, pdf_data):
+        """
+        Rasterize and OCR a PDF page by page
+        
+        Pages are rendered OCR_PDF_PAGE_CONCURRENCY at a time in one process
+        pool call (the next window renders while the current one is OCR'd)
+        and each window's pages are OCR'd concurrently. Paging stops as soon
+        as a page holds a valid MRZ or a date scoring at least
+        OCR_CONFIDENCE_THRESHOLD, so long documents usually cost one or two
+        OCR calls. A page that fails to render or OCR is skipped; the PDF
+        only fails when no page produced text.
+        
+        Returns:
+            str: text of the processed pages in page order
+        """
+        if not pdf_pages.is_available():
+            raise Exception("PDF support requires pypdfium2. Run: pip install pypdfium2")
+        
+        window = max(1, settings.OCR_PDF_PAGE_CONCURRENCY)
+        
+        async def render(start):
+            with ocr_metrics.span("pdf_render", ocr_pages=f"{start + 1}-{start + window}"):
+                return await run_in_process(
+                    pdf_pages.render_pdf_pages,
+                    pdf_data,
+                    start,
+                    min(start + window, settings.OCR_PDF_MAX_PAGES),
+                    settings.OCR_PDF_RENDER_DPI,
+                    settings.OCR_MAX_IMAGE_SIDE,
+                    settings.OCR_JPEG_QUALITY
+                )
+        
+        async def ocr_page(index, page_image):
+            return await self.extract_document_text_async(page_image, f'page-{index + 1}.jpg', 'image/jpeg')
+        
+        try:
+            page_count, pages = await render(0)
+        except Exception as e:
+            raise Exception(f"Could not read PDF: {e}")
+        pages_to_scan = min(page_count, settings.OCR_PDF_MAX_PAGES)
+        logger.debug(f"📄 PDF with {page_count} page(s), scanning up to {pages_to_scan}")
+        
+        texts = {}
+        errors = {}
+        next_start = window
+        next_render = None
+        try:
+            while True:
+                if next_start < pages_to_scan:
+                    next_render = asyncio.create_task(render(next_start))
+                
+                rendered = [(index, image) for index, image, _ in pages if image is not None]
+                errors.update({index: error for index, _, error in pages if error})
+                results = await asyncio.gather(
+                    *(ocr_page(index, image) for index, image in rendered), return_exceptions=True
+                )
+                
+                found = False
+                for (index, _), result in zip(rendered, results):
+                    if isinstance(result, Exception):
+                        errors[index] = str(result)
+                        continue
+                    texts[index] = result
+                    if parse_mrz(result) or self._regex_is_certain(self._regex_expiry(result)):
+                        found = True
+                
+                if found:
+                    logger.debug(f"⏹️  Expiry found, skipping pages after {max(texts) + 1}")
+                    break
+                if next_render is None:
+                    break
+                render_task, next_render = next_render, None
+                try:
+                    _, pages = await render_task
+                except Exception as e:
+                    errors[next_start] = f"Could not render page: {e}"
+                    break
+                next_start += window
+        finally:
+            if next_render is not None:
+                next_render.cancel()
+        
+        if errors:
+            logger.warning(
+                f"⚠️  {len(errors)} PDF page(s) failed: "
+                + "; ".join(f"page {index + 1}: {error}" for index, error in sorted(errors.items()))
+            )
+        if not texts:
+            first_error = errors[min(errors)] if errors else "no pages"
+            raise Exception(f"Could not OCR any PDF page ({first_error})")
+        
+        logger.debug(f"📄 OCR'd {len(texts)} of {page_count} page(s)")
+        return "\n\n".join(texts[index] for index in sorted(texts))
     
-    def process_document(self, image_path):
-        """Complete OCR pipeline with document analysis"""
+    async def process_document_async(self, image, filename=None, content_type=None, batch_gemini=False, upload_ms=None):
+        """
+        Complete OCR pipeline with document analysis (non-blocking)
+        
+        Accepts bytes or a file-like object so uploads never touch disk.
+        Identical images or PDFs are answered from the result cache without
+        any external call. With batch_gemini, documents processed at the
+        same time share batched Gemini requests.
         
-        print(f"\n=== Processing Document ===")
-        print(f"Image path: {image_path}")
+        Every stage is timed (see app/ocr_metrics.py) and one structured
+        log line per document carries the stage timings, plus upload_ms
+        (the time the router spent reading the upload) when given.
+        """
+        stages = {"upload": upload_ms} if upload_ms is not None else None
+        with ocr_metrics.document(stages) as summary:
+            result = await self._process_document_async(image, filename, content_type, batch_gemini)
+            summary.update(
+                ocr_success=result["success"],
+                ocr_method=result.get("method"),
+                ocr_document_type=result["document_type"],
+                ocr_cached=result["cached"]
+            )
+            return result
+    
+    async def _process_document_async(self, image, filename, content_type, batch_gemini):
+        logger.debug(f"=== Processing Document === {filename or 'in-memory upload'}")
         
-        # Extract text using document-optimized detection
-        text = self.extract_document_text(image_path)
+        image = self._read_image_bytes(image)
         
-        print(f"\n=== Full Extracted Text ===")
-        print(text)
-        print("=" * 50)
+        # Content-addressed cache: same bytes -> same extraction
+        cache_key = hashlib.sha256(image).hexdigest()
+        cached = self.result_cache.get(cache_key)
+        if cached:
+            logger.debug(f"⚡ Result cache hit ({cache_key[:12]})")
+            return {**cached, "extracted_text": "", "cached": True}
         
-        # Extract expiry date
-        expiry_date = self.extract_expiry_date(text)
+        if pdf_pages.is_pdf(image):
+            text = await self.extract_pdf_text_async(image)
+        else:
+            if settings.OCR_PREPROCESS_ENABLED:
+                image, processed_type = await self.preprocess_image_async(image)
+                if processed_type:
+                    filename, content_type = 'document.jpg', processed_type
+            
+            # Extract text using document-optimized detection
+            text = await self.extract_document_text_async(image, filename, content_type)
         
-        # Detect document type
-        doc_type = self.detect_document_type(text)
+        logger.debug(f"=== Full Extracted Text ===\n{text}")
+        
+        # Passports / ID cards: a check-digit-validated MRZ is authoritative,
+        # so there's no need to ask Gemini or guess with regexes
+        with ocr_metrics.span("mrz"):
+            mrz = parse_mrz(text)
+        if mrz:
+            self.mrz_hits += 1
+            logger.debug(f"🛂 Valid {mrz.format} MRZ found, expiry {mrz.expiry_date} ({mrz.document_type})")
+            expiry_date = mrz.expiry_date.strftime('%Y-%m-%d')
+            doc_type = mrz.document_type
+            document_number = mrz.document_number
+            confidence, method = 1.0, "mrz"
+        else:
+            # One pass over the text: type keywords, document number, dates
+            with ocr_metrics.span("scan"):
+                scan = scan_document(text)
+            doc_type, document_number = scan.document_type, scan.document_number
+            
+            # Extract expiry date (Gemini only when the scanner is unsure)
+            if batch_gemini:
+                expiry_date, confidence, method = await self._gemini_coalescer.extract(text, scan)
+            else:
+                expiry_date, confidence, method = await self.extract_expiry_async(text, scan)
         
         result = {
             "extracted_text": text,
             "expiry_date": expiry_date,
             "document_type": doc_type,
+            "document_number": document_number,  # Not cached or returned by the API
             "success": expiry_date is not None,
-            "confidence": "high" if expiry_date else "low"
+            "confidence": confidence if expiry_date else 0.0,
+            "method": method,
+            "cached": False
         }
         
-        print(f"\n=== Result ===")
-        print(f"Success: {result['success']}")
-        print(f"Expiry Date: {expiry_date}")
-        print(f"Document Type: {doc_type}")
-        print("=" * 50)
+        # Cache successful extractions only (derived fields, never the text);
+        # failures are re-run so the user gets the OCR text to enter manually
+        if expiry_date:
+            self.result_cache.set(cache_key, {
+                "expiry_date": expiry_date,
+                "document_type": doc_type,
+                "success": True,
+                "confidence": result["confidence"],
+                "method": method
+            })
+        
+        logger.debug(
+            f"=== Result === success={result['success']} expiry={expiry_date} "
+            f"confidence={result['confidence']} type={doc_type} method={method}"
+        )
         
         return result
+    
+    def process_document(self, image, filename=None, content_type=None):
+        """Blocking wrapper around process_document_async (scripts, CLI)"""
+        return self._run_sync(self.process_document_async(image, filename, content_type))
+    
+    def metrics(self):
+        """MRZ, Gemini gating and cache counters for monitoring"""
+        return {
+            "mrz_hits": self.mrz_hits,
+            "gemini_skipped_confident_regex": self.gemini_skips,
+            "ocr_providers": self.ocr_router.stats(),
+            "result_cache": self.result_cache.stats(),
+            "gemini_cache": {
+                **self.gemini_cache.stats(),
+                "gemini_calls": self.gemini_calls,
+                "avg_gemini_latency_seconds": round(self.gemini_latency_total / self.gemini_calls, 3) if self.gemini_calls else None,
+                "saved_latency_seconds": round(self.gemini_saved_seconds, 3)
+            },
+            "gemini_prompts": {
+                "char_budget": settings.GEMINI_PROMPT_CHAR_BUDGET,
+                "avg_source_chars": round(self.gemini_source_chars / self.gemini_calls) if self.gemini_calls else None,
+                "avg_prompt_chars": round(self.gemini_prompt_chars / self.gemini_calls) if self.gemini_calls else None,
+                "avg_latency_seconds_by_prompt_chars": {
+                    bucket: round(total / calls, 3)
+                    for bucket, (calls, total) in self.gemini_latency_by_prompt.items()
+                },
+                # Accuracy proxies: no ground truth at runtime (see the offline benchmark)
+                "answers": self.gemini_answers,
+                "no_answer": self.gemini_no_answer,
+                "agreement_with_scanner": round(self.gemini_agreed / self.gemini_answers, 3) if self.gemini_answers else None
+            },
+            "gemini_batches": {
+                "calls": self.gemini_batch_calls,
+                "documents": self.gemini_batched_texts,
+                "avg_documents_per_call": round(self.gemini_batched_texts / self.gemini_batch_calls, 2) if self.gemini_batch_calls else None,
+                "invalid_entries": self.gemini_invalid_entries,
+                "failed_calls": self.gemini_batch_failures
+            }
+        }
@@ -0,0 +1,70 @@
+"""
+PDF rasterization for OCR (pypdfium2)
+
+Multi-page PDFs (insurance policies, registrations) are rendered locally,
+one page at a time, into the same compact grayscale JPEG the image
+preprocessor produces. Needs the optional `pypdfium2` package.
+
+Functions here run inside the shared process pool, so they must stay
+top-level and only take/return picklable values.
+"""
+
+import io
+
+def is_available() -> bool:
+    """True when pypdfium2 is installed"""
+    try:
+        import pypdfium2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def is_pdf(data: bytes) -> bool:
+    return data[:5] == b'%PDF-'
+
+def render_pdf_pages(data: bytes, start: int, end: int, dpi: int = 200, max_side: int = 2000, quality: int = 85):
+    """
+    Render a range of pages as grayscale JPEGs in one call
+
+    The PDF bytes cross the process boundary once per range instead of
+    once per page. A page that fails to render doesn't fail the others.
+
+    Args:
+        data: PDF bytes
+        start: First zero-based page number
+        end: Page number to stop before (clipped to the page count)
+        dpi: Render resolution (capped so the longest side <= max_side)
+        max_side: Longest side in pixels
+        quality: JPEG quality
+
+    Returns:
+        tuple: (page_count, [(index, jpeg_bytes or None, error or None), ...])
+    """
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(data)
+    try:
+        page_count = len(pdf)
+        pages = []
+        for index in range(start, min(end, page_count)):
+            try:
+                pages.append((index, _render_page(pdf, index, dpi, max_side, quality), None))
+            except Exception as e:
+                pages.append((index, None, f"{type(e).__name__}: {e}"))
+        return page_count, pages
+    finally:
+        pdf.close()
+
+def _render_page(pdf, index, dpi, max_side, quality) -> bytes:
+    page = pdf[index]
+    try:
+        width, height = page.get_size()  # PDF points (1/72 inch)
+        scale = min(dpi / 72, max_side / max(width, height))
+        bitmap = page.render(scale=scale, grayscale=True)
+        image = bitmap.to_pil()
+    finally:
+        page.close()
+
+    output = io.BytesIO()
+    image.convert("L").save(output, format="JPEG", quality=quality, optimize=True)
+    return output.getvalue()
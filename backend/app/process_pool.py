@@ -0,0 +1,43 @@
+"""
+Shared process pool for CPU-bound OCR work
+
+Image decoding/re-encoding (and any local OCR engine) must not run on the
+API workers' event loop. Work is sent to a lazily created
+ProcessPoolExecutor sized to the CPU count (override: OCR_PROCESS_WORKERS).
+"""
+
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from app.config import settings
+
+_pool = None
+_lock = threading.Lock()
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Create the pool on first use"""
+    global _pool
+    with _lock:
+        if _pool is None:
+            workers = settings.OCR_PROCESS_WORKERS or os.cpu_count() or 1
+            # "spawn" - forking a server that already runs threads is unsafe
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+async def run_in_process(func, *args):
+    """Run a picklable top-level function in the pool without blocking the loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_process_pool(), func, *args)
+
+def shutdown_process_pool():
+    """Stop worker processes (application shutdown)"""
+    global _pool
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
@@ -17,6 +17,7 @@ from app.auth import (
     get_current_active_user
 )
 from app.config import settings
+from app.webhook_service import WEBHOOK_TIERS, UnsafeWebhookURL, validate_webhook_url
 import secrets
 
 router = APIRouter(prefix="/api/auth", tags=["Authentication"])
@@ -74,6 +75,8 @@ class ReminderSettings(BaseModel):
     reminder_intervals: dict | None = None
     notify_email: str | None = None
     notify_sms: str | None = None
+    webhook_url: str | None = None  # "" removes the webhook
+    rotate_webhook_secret: bool = False
 
 @router.post("/register", response_model=Token)
 def register(user_data: UserRegister, db: Session = Depends(get_db)):
@@ -239,7 +242,8 @@ def get_reminder_settings(
                 "7_days": True
             },
             "notify_email": current_user.notify_email,
-            "notify_sms": current_user.notify_sms
+            "notify_sms": current_user.notify_sms,
+            "webhook_url": current_user.webhook_url
         },
         headers={
             "Cache-Control": "private, max-age=300"  # Cache for 5 minutes
@@ -255,7 +259,8 @@ def get_reminder_settings(
             "7_days": True
         },
         "notify_email": current_user.notify_email,
-        "notify_sms": current_user.notify_sms
+        "notify_sms": current_user.notify_sms,
+        "webhook_url": current_user.webhook_url
     }
 
 @router.put("/settings")
@@ -272,8 +277,35 @@ def update_reminder_settings(
     - reminder_intervals: Enable/disable specific reminder intervals
     - notify_email: Enable/disable email notifications
     - notify_sms: Enable/disable SMS notifications
+    - webhook_url: Deliver reminders to your own endpoint (business/enterprise)
+    - rotate_webhook_secret: Generate a new webhook signing secret
+    
+    The webhook signing secret is only returned when it is created or rotated.
     """
     
+    new_webhook_secret = None
+    if settings.webhook_url is not None or settings.rotate_webhook_secret:
+        if current_user.subscription_tier not in WEBHOOK_TIERS:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Webhooks are available on Business and Enterprise plans"
+            )
+    
+    if settings.webhook_url is not None:
+        webhook_url = settings.webhook_url.strip()
+        if webhook_url:
+            try:
+                validate_webhook_url(webhook_url)
+            except UnsafeWebhookURL as e:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        current_user.webhook_url = webhook_url or None
+        if not webhook_url:
+            current_user.webhook_secret = None
+    
+    if current_user.webhook_url and (settings.rotate_webhook_secret or not current_user.webhook_secret):
+        new_webhook_secret = secrets.token_hex(32)
+        current_user.webhook_secret = new_webhook_secret
+    
     if settings.alternate_email is not None:
         current_user.alternate_email = settings.alternate_email
     
@@ -295,8 +327,10 @@ def update_reminder_settings(
             "alternate_email": current_user.alternate_email,
             "reminder_intervals": current_user.reminder_intervals,
             "notify_email": current_user.notify_email,
-            "notify_sms": current_user.notify_sms
-        }
+            "notify_sms": current_user.notify_sms,
+            "webhook_url": current_user.webhook_url
+        },
+        "webhook_secret": new_webhook_secret
     }
 
 # Google OAuth Routes (redirect flow - for alternative OAuth method)
@@ -1,4 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException
+import base64
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import and_, or_, func, literal_column, select, union_all
 from sqlalchemy.orm import Session
 from typing import List
 from datetime import datetime, date
@@ -76,14 +78,110 @@ def create_document(
     
     return db_document
 
-@router.get("/", response_model=List[DocumentResponse])
+class DocumentListItem(BaseModel):
+    """A listed document: only the fields asked for with ?fields= are returned"""
+    id: str | None = None
+    user_id: str | None = None
+    document_name: str | None = None
+    document_type: str | None = None
+    expiry_date: date | None = None
+    status: str | None = None
+    created_at: datetime | None = None
+
+# Columns a client may ask for with ?fields= (same names as DocumentResponse)
+LISTABLE_FIELDS = list(DocumentResponse.model_fields)
+DEFAULT_PAGE_SIZE = 100  # When a cursor is passed without a limit
+
+def _encode_cursor(expiry_date: date, document_id: str) -> str:
+    raw = f"{expiry_date.isoformat()}|{document_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def _decode_cursor(cursor: str):
+    """(expiry_date, id) of the last row of the previous page"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        expiry, document_id = raw.split("|", 1)
+        return date.fromisoformat(expiry), document_id
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _parse_fields(fields: str | None) -> List[str]:
+    if not fields:
+        return LISTABLE_FIELDS
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in LISTABLE_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown field(s): {', '.join(unknown)}. Allowed: {', '.join(LISTABLE_FIELDS)}"
+        )
+    return requested
+
+@router.get("/", response_model=List[DocumentListItem], response_model_exclude_unset=True)
 def get_documents(
+    response: Response,
+    limit: int | None = Query(None, ge=1, le=500),
+    cursor: str | None = None,
+    status: List[str] | None = Query(None),
+    document_type: str | None = None,
+    expires_after: date | None = None,
+    expires_before: date | None = None,
+    fields: str | None = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get all documents for current user (requires authentication)"""
-    documents = db.query(Document).filter(Document.user_id == current_user.id).all()
-    return documents
+    """
+    Get the current user's documents, soonest expiry first (requires authentication)
+    
+    Returns every matching document unless `limit` or `cursor` is passed.
+    Pages are keyset-paginated on (expiry_date, id) via
+    idx_documents_user_expiry_id: when there are more rows the X-Next-Cursor
+    header holds the value to pass as `cursor` for the next page.
+    
+    Args:
+        limit: Page size (default 100 when only a cursor is passed)
+        cursor: X-Next-Cursor from the previous page
+        status: Only these statuses (repeatable, e.g. ?status=expired&status=expiring_soon)
+        document_type: Only this document type
+        expires_after: Expiry date on or after this day
+        expires_before: Expiry date on or before this day
+        fields: Comma-separated subset of the document fields to return
+    """
+    selected = _parse_fields(fields)
+    # Only the projected columns are loaded (plus the keyset columns)
+    columns = list(dict.fromkeys(selected + ["expiry_date", "id"]))
+    query = db.query(*[getattr(Document, name) for name in columns]).filter(
+        Document.user_id == current_user.id
+    )
+    
+    if status:
+        query = query.filter(Document.status.in_(status))
+    if document_type:
+        query = query.filter(Document.document_type == document_type)
+    if expires_after:
+        query = query.filter(Document.expiry_date >= expires_after)
+    if expires_before:
+        query = query.filter(Document.expiry_date <= expires_before)
+    if cursor:
+        last_expiry, last_id = _decode_cursor(cursor)
+        query = query.filter(or_(
+            Document.expiry_date > last_expiry,
+            and_(Document.expiry_date == last_expiry, Document.id > last_id)
+        ))
+    
+    query = query.order_by(Document.expiry_date, Document.id)
+    if limit is None and cursor is None:
+        # Unpaginated, as clients that predate paging expect
+        rows = query.all()
+    else:
+        limit = limit or DEFAULT_PAGE_SIZE
+        # One extra row tells whether there is a next page
+        rows = query.limit(limit + 1).all()
+        if len(rows) > limit:
+            rows = rows[:limit]
+            response.headers["X-Next-Cursor"] = _encode_cursor(rows[-1].expiry_date, rows[-1].id)
+    
+    return [{name: getattr(row, name) for name in selected} for row in rows]
 
 @router.get("/{document_id}", response_model=DocumentResponse)
 def get_document(
@@ -155,22 +253,58 @@ def delete_document(
     
     return {"message": "Document deleted successfully"}
 
+def _expiry_month(db: Session):
+    """YYYY-MM of the expiry date in the database's own dialect"""
+    if db.get_bind().dialect.name == "sqlite":
+        return func.strftime(literal_column("'%Y-%m'"), Document.expiry_date)
+    return func.to_char(Document.expiry_date, literal_column("'YYYY-MM'"))
+
 @router.get("/stats/summary")
 def get_stats(
+    by_type: bool = False,
+    by_month: bool = False,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get document statistics for current user (requires authentication)"""
-    documents = db.query(Document).filter(Document.user_id == current_user.id).all()
-    
-    total = len(documents)
-    expired = sum(1 for d in documents if d.status == "expired")
-    expiring_soon = sum(1 for d in documents if d.status in ["expiring_soon", "expiring_this_month"])
-    valid = sum(1 for d in documents if d.status == "valid")
-    
-    return {
-        "total": total,
-        "expired": expired,
-        "expiring_soon": expiring_soon,
-        "valid": valid
+    """
+    Get document statistics for current user (requires authentication)
+    
+    Counts are aggregated in the database (GROUP BY status on
+    idx_documents_user_status); the optional breakdowns are UNION ALL'd
+    into the same query so it stays one round trip.
+    
+    Args:
+        by_type: Also return counts per document_type
+        by_month: Also return counts per expiry month (YYYY-MM)
+    """
+    dimensions = {"status": Document.status}
+    if by_type:
+        dimensions["document_type"] = Document.document_type
+    if by_month:
+        dimensions["month"] = _expiry_month(db)
+    
+    query = union_all(*[
+        select(
+            literal_column(f"'{name}'").label("dimension"),
+            column.label("key"),
+            func.count().label("count")
+        ).where(Document.user_id == current_user.id).group_by(column)
+        for name, column in dimensions.items()
+    ])
+    
+    counts = {name: {} for name in dimensions}
+    for dimension, key, count in db.execute(query):
+        counts[dimension][key] = count
+    
+    by_status = counts["status"]
+    stats = {
+        "total": sum(by_status.values()),
+        "expired": by_status.get("expired", 0),
+        "expiring_soon": by_status.get("expiring_soon", 0) + by_status.get("expiring_this_month", 0),
+        "valid": by_status.get("valid", 0)
     }
+    if by_type:
+        stats["by_type"] = counts["document_type"]
+    if by_month:
+        stats["by_month"] = dict(sorted(counts["month"].items()))
+    return stats
@@ -0,0 +1,172 @@
+"""
+In-app notification routes - feed, unread count and Server-Sent Events push
+"""
+
+import asyncio
+import json
+from fastapi import APIRouter, Depends, HTTPException, Request, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import get_db, SessionLocal
+from app.models import Notification
+from app.models.user import User
+from app.auth import get_current_user, get_current_user_for_stream
+from app.notification_broker import notification_broker
+
+router = APIRouter(prefix="/api/notifications", tags=["Notifications"])
+
+def _unread_count(db: Session, user_id: str) -> int:
+    """Served from idx_notifications_user_unread"""
+    return db.query(func.count(Notification.id)).filter(
+        Notification.user_id == user_id,
+        Notification.is_read == False  # noqa: E712
+    ).scalar()
+
+@router.get("/")
+def get_notifications(
+    limit: int = Query(50, ge=1, le=200),
+    before_id: int | None = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get the latest notifications for current user (newest first)"""
+    query = db.query(Notification).filter(Notification.user_id == current_user.id)
+    if before_id is not None:
+        query = query.filter(Notification.id < before_id)
+    notifications = query.order_by(Notification.id.desc()).limit(limit).all()
+    return [n.to_dict() for n in notifications]
+
+@router.get("/unread-count")
+def get_unread_count(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get number of unread notifications"""
+    return {"unread": _unread_count(db, current_user.id)}
+
+@router.post("/{notification_id}/read")
+def mark_read(
+    notification_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Mark a single notification as read"""
+    updated = db.query(Notification).filter(
+        Notification.id == notification_id,
+        Notification.user_id == current_user.id
+    ).update({Notification.is_read: True}, synchronize_session=False)
+    db.commit()
+
+    if not updated:
+        raise HTTPException(status_code=404, detail="Notification not found")
+
+    return {"unread": _unread_count(db, current_user.id)}
+
+@router.post("/read-all")
+def mark_all_read(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Mark all notifications as read"""
+    db.query(Notification).filter(
+        Notification.user_id == current_user.id,
+        Notification.is_read == False  # noqa: E712
+    ).update({Notification.is_read: True}, synchronize_session=False)
+    db.commit()
+
+    return {"unread": 0}
+
+def _fetch_since(user_id: str, after_id: int | None):
+    """
+    Load notifications newer than the cursor plus the unread count
+
+    Uses a short-lived session so an open stream never pins a pooled
+    database connection between events.
+    """
+    db = SessionLocal()
+    try:
+        if after_id is None:
+            # Fresh connection: only push what arrives from now on
+            latest = db.query(func.max(Notification.id)).filter(
+                Notification.user_id == user_id
+            ).scalar()
+            return [], latest or 0, _unread_count(db, user_id)
+
+        rows = db.query(Notification).filter(
+            Notification.user_id == user_id,
+            Notification.id > after_id
+        ).order_by(Notification.id).limit(100).all()
+
+        cursor = rows[-1].id if rows else after_id
+        return [n.to_dict() for n in rows], cursor, _unread_count(db, user_id)
+    finally:
+        db.close()
+
+def _sse(event: str, data: dict, event_id: int | None = None) -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+@router.get("/stream")
+async def stream_notifications(
+    request: Request,
+    current_user: User = Depends(get_current_user_for_stream)
+):
+    """
+    Server-Sent Events stream of new notifications
+
+    Events:
+    - reminder / status_change: a new notification (id = resume cursor)
+    - unread_count: current unread badge count
+
+    Reconnecting clients send `Last-Event-ID` and receive what they missed.
+    Use `?token=<jwt>` when connecting with the browser EventSource API.
+    """
+    user_id = current_user.id
+    last_event_id = request.headers.get("last-event-id")
+    cursor = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+    keep_alive = settings.NOTIFICATION_STREAM_KEEPALIVE_SECONDS
+
+    async def event_stream():
+        nonlocal cursor
+        wake = notification_broker.subscribe(user_id)
+        try:
+            rows, cursor, unread = await run_in_threadpool(_fetch_since, user_id, cursor)
+            yield f"retry: {keep_alive * 1000}\n\n"
+            for row in rows:
+                yield _sse(row["kind"], row, row["id"])
+            yield _sse("unread_count", {"unread": unread})
+
+            while not await request.is_disconnected():
+                try:
+                    await asyncio.wait_for(wake.wait(), timeout=keep_alive)
+                except asyncio.TimeoutError:
+                    pass
+                wake.clear()
+
+                # Re-check on every wake-up and keep-alive tick: rows written
+                # by another worker process don't signal this one
+                rows, cursor, unread = await run_in_threadpool(_fetch_since, user_id, cursor)
+                if rows:
+                    for row in rows:
+                        yield _sse(row["kind"], row, row["id"])
+                    yield _sse("unread_count", {"unread": unread})
+                else:
+                    yield ": keep-alive\n\n"
+        finally:
+            notification_broker.unsubscribe(user_id, wake)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # Disable proxy buffering
+        }
+    )
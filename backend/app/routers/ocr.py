@@ -1,82 +1,273 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
+import asyncio
+import json
+import time
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from app.config import settings
 from app.ocr_service import OCRService
-import shutil
-import os
-from pathlib import Path
+from app.ocr_jobs import OCRJobQueue, QueueFullError, TERMINAL_STATUSES
+from app.admission import AdmissionController, AdmissionRejected
+from app.ocr_metrics import ocr_metrics as pipeline_metrics
+from app.upload_reader import read_upload, read_uploads, upload_openapi, UploadRejected
+from app.models.user import User
+from app.auth import get_current_user, get_current_user_for_stream
 
 router = APIRouter(prefix="/api/ocr", tags=["OCR"])
 
-UPLOAD_DIR = Path("uploads")
-UPLOAD_DIR.mkdir(exist_ok=True)
-
 # Initialize OCR service
 ocr_service = OCRService()
 
-@router.post("/extract-expiry")
-async def extract_expiry_date(file: UploadFile = File(...)):
+# Bounds concurrent OCR.space / Gemini work across all endpoints
+ocr_admission = AdmissionController(
+    settings.OCR_MAX_CONCURRENCY,
+    settings.OCR_ADMISSION_QUEUE_SIZE,
+    settings.OCR_ADMISSION_WAIT_SECONDS
+)
+
+async def _process_job(data, filename, content_type, upload_ms):
+    # The job queue is bounded already, so jobs wait for a slot instead of failing
+    async with ocr_admission.slot(bounded=False):
+        result = await ocr_service.process_document_async(
+            data, filename=filename, content_type=content_type, upload_ms=upload_ms
+        )
+    return _build_response(result)
+
+# Background OCR jobs (POST /jobs)
+ocr_jobs = OCRJobQueue(_process_job)
+
+@router.post("/extract-expiry", openapi_extra=upload_openapi("file"))
+async def extract_expiry_date(request: Request):
     """
-    Upload document image and extract expiry date using OCR + AI.
+    Upload document image (or multi-page PDF) and extract expiry date using OCR + AI.
     
     🔒 PRIVACY GUARANTEE:
     - Your document image is NEVER stored on our servers
-    - Image is deleted immediately after OCR processing
+    - Image is processed in memory and never written to disk
     - Only expiry date and document type are extracted
     - No personal information is retained
     """
     
-    # Validate file type
-    allowed_types = ["image/jpeg", "image/png", "image/jpg", "image/webp"]
-    if file.content_type not in allowed_types:
-        raise HTTPException(400, "Only JPEG/PNG/WEBP images allowed")
+    _check_admission()
+    upload, upload_ms = await _read_upload(request)
+    
+    try:
+        async with ocr_admission.slot():
+            result = await ocr_service.process_document_async(
+                upload.data, filename=upload.filename, content_type=upload.content_type, upload_ms=upload_ms
+            )
+        return _build_response(result)
+        
+    except AdmissionRejected as e:
+        raise _too_busy(e)
+    except Exception as e:
+        raise HTTPException(500, f"OCR processing failed: {str(e)}")
+
+@router.post("/extract-expiry/batch", openapi_extra=upload_openapi("files", multiple=True))
+async def extract_expiry_dates_batch(request: Request):
+    """
+    Upload several document images and extract their expiry dates.
     
-    # Check file size (max 10MB)
-    file.file.seek(0, 2)
-    file_size = file.file.tell()
-    file.file.seek(0)
+    Documents are processed concurrently (OCR_BATCH_CONCURRENCY at a time)
+    and the response streams one NDJSON line per document as soon as it
+    finishes, in completion order. Each line carries the upload's `index`
+    and `filename` plus the same fields as /extract-expiry (or `error`).
     
-    if file_size > 10 * 1024 * 1024:
-        raise HTTPException(400, "File size must be less than 10MB")
+    🔒 Images are held in memory for the duration of the request only.
+    """
     
-    # Save uploaded file temporarily
-    file_path = UPLOAD_DIR / file.filename
+    _check_admission()
     
+    # Oversized or non-image files get an error line, the rest are processed
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # Process with OCR
-        result = ocr_service.process_document(str(file_path))
-        
-        # 🔒 PRIVACY: Immediately delete the uploaded image
-        os.remove(file_path)
-        print(f"🔒 Privacy: Document image deleted after processing")
-        
-        if not result["success"]:
-            return {
-                "success": False,
-                "message": "Could not extract expiry date automatically. Please check the text below and enter manually.",
-                "extracted_text": result["extracted_text"],
-                "document_type": result["document_type"],
-                "help": "Look for dates like: 'Expiry: 12/08/2026' or 'Valid until: 12 Aug 2026'",
-                "privacy_note": "Your document image was not stored and has been deleted."
-            }
-        
+        with pipeline_metrics.span("upload") as timing:
+            files = await read_uploads(request, "files", settings.OCR_BATCH_MAX_FILES)
+    except UploadRejected as e:
+        raise HTTPException(e.status_code, e.detail)
+    # One request carries every file: each document's log line gets its share
+    upload_ms = round(timing["duration_ms"] / max(1, len(files)), 2)
+    uploads = [
+        (index, upload.filename, upload.content_type, upload.data, upload.error)
+        for index, upload in enumerate(files)
+    ]
+    
+    semaphore = asyncio.Semaphore(settings.OCR_BATCH_CONCURRENCY)
+    
+    async def process(index, filename, content_type, data, error):
+        line = {"index": index, "filename": filename}
+        if error:
+            return {**line, "success": False, "error": error}
+        async with semaphore:
+            try:
+                async with ocr_admission.slot():
+                    # Unsure documents in this batch share Gemini requests
+                    result = await ocr_service.process_document_async(
+                        data, filename=filename, content_type=content_type, batch_gemini=True, upload_ms=upload_ms
+                    )
+                return {**line, **_build_response(result)}
+            except AdmissionRejected as e:
+                return {**line, "success": False, "error": _too_busy(e).detail, "retry_after": e.retry_after}
+            except Exception as e:
+                return {**line, "success": False, "error": f"OCR processing failed: {str(e)}"}
+    
+    async def stream():
+        tasks = [asyncio.create_task(process(*upload)) for upload in uploads]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield json.dumps(await next_done) + "\n"
+        finally:
+            # Client went away - stop the remaining work
+            for task in tasks:
+                task.cancel()
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+@router.post("/jobs", status_code=202, openapi_extra=upload_openapi("file"))
+async def create_ocr_job(request: Request, current_user: User = Depends(get_current_user)):
+    """
+    Queue a document for OCR and return immediately (requires authentication).
+    
+    Poll `status_url` or follow `events_url` (Server-Sent Events) for the
+    result; only the submitting user can see the job. Results are kept for
+    OCR_JOB_RESULT_TTL_SECONDS and the image itself is discarded as soon
+    as processing starts.
+    """
+    
+    upload, upload_ms = await _read_upload(request)
+    
+    try:
+        job = await ocr_jobs.submit(
+            upload.data, upload.filename, upload.content_type, user_id=current_user.id, upload_ms=upload_ms
+        )
+    except QueueFullError:
+        raise HTTPException(503, "OCR queue is full, please try again shortly")
+    
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/api/ocr/jobs/{job.id}",
+        "events_url": f"/api/ocr/jobs/{job.id}/events"
+    }
+
+@router.get("/jobs/{job_id}")
+async def get_ocr_job(job_id: str, current_user: User = Depends(get_current_user)):
+    """Current status of one of your OCR jobs (and its result once done)"""
+    state = await ocr_jobs.get(job_id, current_user.id)
+    if not state:
+        raise HTTPException(404, "Job not found or expired")
+    return state
+
+@router.get("/jobs/{job_id}/events")
+async def stream_ocr_job(
+    job_id: str,
+    request: Request,
+    current_user: User = Depends(get_current_user_for_stream)
+):
+    """
+    Server-Sent Events for one of your OCR jobs
+    
+    Sends a `status` event on every change (queued -> processing ->
+    done/failed) and closes the stream after the final one. EventSource
+    clients pass the token as `?token=`.
+    """
+    user_id = current_user.id
+    if not await ocr_jobs.get(job_id, user_id):
+        raise HTTPException(404, "Job not found or expired")
+    
+    keep_alive = settings.NOTIFICATION_STREAM_KEEPALIVE_SECONDS
+    
+    async def event_stream():
+        last_status = None
+        last_sent = time.monotonic()
+        while not await request.is_disconnected():
+            state = await ocr_jobs.get(job_id, user_id)
+            if state is None:
+                return  # Expired
+            if state["status"] != last_status:
+                last_status = state["status"]
+                last_sent = time.monotonic()
+                yield f"event: status\ndata: {json.dumps(state)}\n\n"
+                if state["status"] in TERMINAL_STATUSES:
+                    return
+            elif time.monotonic() - last_sent >= keep_alive:
+                last_sent = time.monotonic()
+                yield ": keep-alive\n\n"
+            
+            await ocr_jobs.wait_for_update(job_id, timeout=keep_alive)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # Disable proxy buffering
+        }
+    )
+
+def _too_busy(e: AdmissionRejected):
+    return HTTPException(
+        429,
+        f"OCR service is busy, please try again in {e.retry_after} seconds",
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
+def _check_admission():
+    """429 before the upload is read when the wait queue is already full"""
+    try:
+        ocr_admission.check()
+    except AdmissionRejected as e:
+        raise _too_busy(e)
+
+async def _read_upload(request: Request):
+    """
+    Read the `file` part, rejecting unsupported types and files over 10MB
+    
+    The type is sniffed from the first bytes and the body is read in
+    chunks, so bad uploads are refused before they are fully received.
+    
+    Returns:
+        (upload, milliseconds spent reading it)
+    """
+    try:
+        with pipeline_metrics.span("upload") as timing:
+            upload = await read_upload(request, "file")
+    except UploadRejected as e:
+        raise HTTPException(e.status_code, e.detail)
+    return upload, timing["duration_ms"]
+
+def _build_response(result):
+    """API response for one processed document"""
+    
+    if not result["success"]:
         return {
-            "success": True,
-            "expiry_date": result["expiry_date"],
+            "success": False,
+            "message": "Could not extract expiry date automatically. Please check the text below and enter manually.",
+            "extracted_text": result["extracted_text"],
             "document_type": result["document_type"],
-            "confidence": result["confidence"],
-            "message": "Expiry date extracted successfully",
-            "preview_text": result["extracted_text"][:200] if result["extracted_text"] else "",
-            "privacy_note": "Your document image was not stored and has been deleted."
+            "help": "Look for dates like: 'Expiry: 12/08/2026' or 'Valid until: 12 Aug 2026'",
+            "privacy_note": "Your document image was processed in memory and never stored."
         }
-        
-    except Exception as e:
-        # 🔒 PRIVACY: Clean up on error - ensure image is deleted
-        if file_path.exists():
-            os.remove(file_path)
-            print(f"🔒 Privacy: Document image deleted after error")
-        raise HTTPException(500, f"OCR processing failed: {str(e)}")
+    
+    return {
+        "success": True,
+        "expiry_date": result["expiry_date"],
+        "document_type": result["document_type"],
+        "confidence": result["confidence"],
+        "method": result.get("method"),
+        "message": "Expiry date extracted successfully",
+        "preview_text": result["extracted_text"][:200] if result["extracted_text"] else "",
+        "cached": result.get("cached", False),
+        "privacy_note": "Your document image was processed in memory and never stored."
+    }
+
+@router.get("/metrics")
+def ocr_metrics():
+    """OCR pipeline counters (cache hit rates, stage latency histograms, admission queue, job queue)"""
+    return {
+        **ocr_service.metrics(),
+        "stages": pipeline_metrics.stats(),
+        "admission": ocr_admission.stats(),
+        "jobs": ocr_jobs.stats()
+    }
 
 @router.get("/health")
 def ocr_health():
@@ -89,6 +280,8 @@ def ocr_health():
                 "status": "healthy",
                 "provider": "OCR.space API",
                 "configured": True,
+                "providers": ocr_service.ocr_router.names,
+                "local_engine": ocr_service.local_engine_mode,
                 "note": "Using free OCR.space API (25,000 requests/month)"
             }
         else:
@@ -96,6 +289,8 @@ def ocr_health():
                 "status": "healthy",
                 "provider": "OCR.space API",
                 "configured": True,
+                "providers": ocr_service.ocr_router.names,
+                "local_engine": ocr_service.local_engine_mode,
                 "note": "Using public API key (rate limited)"
             }
     except Exception as e:
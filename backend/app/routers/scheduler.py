@@ -1,5 +1,7 @@
 from fastapi import APIRouter, HTTPException
 from app.scheduler import check_expiring_documents, scheduler
+from app.notification_dispatcher import notification_dispatcher
+from app.webhook_service import webhook_dispatcher
 from datetime import datetime
 
 router = APIRouter(prefix="/api/scheduler", tags=["Scheduler"])
@@ -25,6 +27,10 @@ def scheduler_health():
             "next_run_time": next_run.isoformat() if next_run else None,
             "current_time": datetime.now().isoformat(),
             "schedule": "Daily at 9:00 AM",
+            "notification_channels": {
+                **notification_dispatcher.stats(),
+                "webhook": webhook_dispatcher.stats()
+            },
             "message": "Scheduler is healthy and running" if is_running else "Scheduler is not running"
         }
     except Exception as e:
@@ -82,10 +88,11 @@ def scheduler_info():
             "Duplicate reminder prevention",
             "Status auto-updates",
             "Console logging",
+            "Parallel per-channel delivery queues",
             "Error handling"
         ],
         "notification_methods": {
-            "implemented": ["Console logging"],
-            "planned": ["Email", "SMS", "Push notifications", "In-app alerts"]
+            "implemented": ["Console logging", "Email", "SMS", "In-app alerts (SSE)", "Webhooks (business)"],
+            "planned": ["Push notifications"]
         }
     }
@@ -1,8 +1,13 @@
 from apscheduler.schedulers.background import BackgroundScheduler
+from sqlalchemy import insert
 from datetime import datetime, timedelta
+from app.config import settings
 from app.database import SessionLocal
-from app.models import Document
+from app.models import Document, Notification
 from app.notification_service import notification_service
+from app.notification_dispatcher import notification_dispatcher
+from app.notification_broker import notification_broker
+from app.webhook_service import webhook_dispatcher, WEBHOOK_TIERS
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -12,8 +17,12 @@ def send_notification(doc, reminder_type, days_remaining):
     """
     Send notification to user about expiring document
     
-    Supports: Email, SMS, Console logging
+    Supports: Email, SMS, Webhook, Console logging
     Respects user's reminder interval preferences
+    Deliveries are queued per channel and sent in parallel
+    
+    Returns:
+        bool: False if the user disabled this reminder interval
     """
     
     # Get user to check preferences
@@ -26,7 +35,7 @@ def send_notification(doc, reminder_type, days_remaining):
         if not user.reminder_intervals.get(reminder_type, True):
             logger.info(f"⏭️  Skipping {reminder_type} reminder for {doc.document_name} - interval disabled by user")
             db.close()
-            return
+            return False
     
     # Use alternate email if set, otherwise use document email
     email_to_use = doc.email
@@ -34,6 +43,11 @@ def send_notification(doc, reminder_type, days_remaining):
         email_to_use = user.alternate_email
         logger.info(f"📧 Using alternate email: {email_to_use}")
     
+    # Webhook channel for business / enterprise accounts
+    webhook = None
+    if user and user.webhook_url and user.webhook_secret and user.subscription_tier in WEBHOOK_TIERS:
+        webhook = (user.webhook_url, user.webhook_secret)
+    
     db.close()
     
     # Emoji based on urgency
@@ -61,9 +75,13 @@ def send_notification(doc, reminder_type, days_remaining):
     ╚══════════════════════════════════════════════════════════╝
     """)
     
-    # Send Email notification
+    # Fan out to independent per-channel queues so a slow channel
+    # never delays the others
     if doc.notify_email == "Y":
-        success = notification_service.send_email(
+        notification_dispatcher.submit(
+            "email",
+            notification_service.send_email,
+            f"Email notification to {email_to_use} for {doc.document_name}",
             to_email=email_to_use,
             document_name=doc.document_name,
             document_type=doc.document_type,
@@ -71,24 +89,44 @@ def send_notification(doc, reminder_type, days_remaining):
             days_remaining=days_remaining,
             reminder_type=reminder_type
         )
-        if success:
-            logger.info(f"✉️  Email notification sent to {email_to_use}")
-        else:
-            logger.warning(f"⚠️  Failed to send email to {email_to_use}")
     
-    # Send SMS notification
     if doc.phone and doc.notify_sms == "Y":
-        success = notification_service.send_sms(
+        notification_dispatcher.submit(
+            "sms",
+            notification_service.send_sms,
+            f"SMS notification to {doc.phone} for {doc.document_name}",
             to_phone=doc.phone,
             document_name=doc.document_name,
             document_type=doc.document_type,
             expiry_date=str(doc.expiry_date),
             days_remaining=days_remaining
         )
-        if success:
-            logger.info(f"📱 SMS notification sent to {doc.phone}")
-        else:
-            logger.warning(f"⚠️  Failed to send SMS to {doc.phone}")
+    
+    if webhook:
+        webhook_dispatcher.submit(webhook[0], webhook[1], {
+            "type": "document.expiring",
+            "reminder_type": reminder_type,
+            "days_remaining": days_remaining,
+            "document": {
+                "id": doc.id,
+                "name": doc.document_name,
+                "type": doc.document_type,
+                "expiry_date": str(doc.expiry_date),
+            },
+        })
+    
+    return True
+
+def _in_app_notification(doc, kind, title, message):
+    """Row for the in-app feed (bulk inserted at the end of the sweep)"""
+    return {
+        "user_id": doc.user_id,
+        "document_id": doc.id,
+        "kind": kind,
+        "title": title,
+        "message": message,
+        "is_read": False,
+    }
 
 def check_expiring_documents():
     """
@@ -111,6 +149,7 @@ def check_expiring_documents():
         ]
         
         total_reminders_sent = 0
+        in_app_rows = []
         
         for days, reminder_type, label in reminder_intervals:
             reminder_date = today + timedelta(days=days)
@@ -130,7 +169,13 @@ def check_expiring_documents():
                     continue
                 
                 # Send notification
-                send_notification(doc, reminder_type, days)
+                if send_notification(doc, reminder_type, days):
+                    in_app_rows.append(_in_app_notification(
+                        doc,
+                        "reminder",
+                        f"{doc.document_name} expires in {label}",
+                        f"Your {doc.document_type.replace('_', ' ')} expires on {doc.expiry_date}."
+                    ))
                 
                 # Update reminder_sent tracking
                 if not doc.reminder_sent:
@@ -159,11 +204,32 @@ def check_expiring_documents():
             
             if old_status != doc.status:
                 logger.info(f"📌 Status changed: {doc.document_name} ({old_status} → {doc.status})")
+                in_app_rows.append(_in_app_notification(
+                    doc,
+                    "status_change",
+                    f"{doc.document_name} is now {doc.status.replace('_', ' ')}",
+                    f"Status changed from {(old_status or 'unknown').replace('_', ' ')} to {doc.status.replace('_', ' ')}."
+                ))
             
             status_updates[doc.status] += 1
         
+        # One bulk INSERT for the whole in-app feed
+        if in_app_rows:
+            db.execute(insert(Notification), in_app_rows)
+        
         db.commit()
         
+        # Wake connected SSE streams for the affected users
+        notification_broker.publish(row["user_id"] for row in in_app_rows)
+        
+        # Wait for queued deliveries so the summary reflects them
+        drained = notification_dispatcher.wait_until_idle(settings.NOTIFICATION_DRAIN_TIMEOUT)
+        drained = webhook_dispatcher.wait_until_idle(settings.NOTIFICATION_DRAIN_TIMEOUT) and drained
+        if not drained:
+            logger.warning("⚠️  Notification queues still draining after timeout")
+        channel_stats = notification_dispatcher.stats()
+        webhook_stats = webhook_dispatcher.stats()
+        
         # Summary
         logger.info(f"""
         ╔══════════════════════════════════════════════════════════╗
@@ -171,12 +237,18 @@ def check_expiring_documents():
         ╠══════════════════════════════════════════════════════════╣
         ║  Date: {today}
         ║  Reminders Sent: {total_reminders_sent}
+        ║  In-App Notifications: {len(in_app_rows)}
         ║  
         ║  Status Summary:
         ║    • Valid: {status_updates['valid']}
         ║    • Expiring This Month: {status_updates['expiring_this_month']}
         ║    • Expiring Soon: {status_updates['expiring_soon']}
         ║    • Expired: {status_updates['expired']}
+        ║  
+        ║  Delivery totals since startup (sent / failed / pending):
+        ║    • Email: {channel_stats['email']['sent']} / {channel_stats['email']['failed']} / {channel_stats['email']['pending']}
+        ║    • SMS: {channel_stats['sms']['sent']} / {channel_stats['sms']['failed']} / {channel_stats['sms']['pending']}
+        ║    • Webhook: {webhook_stats['delivered_events']} / {webhook_stats['failed']} / {webhook_stats['pending']}
         ╚══════════════════════════════════════════════════════════╝
         """)
         
@@ -0,0 +1,479 @@
+"""
+Single-pass document field scanner for OCR text
+
+scan_document() walks the text once with one precompiled regex that
+matches document type keywords, labels ("Date of expiry", "Gültig bis",
+"Issued", "DOB", ...), document numbers and dates in every supported
+format. Each date is parsed with a format-specific fast path (plain int
+conversion); dateutil is only used as a fallback. Date candidates are
+de-duplicated by date and carry their span and label.
+
+New document types and languages are extra alternatives in the same
+pattern, not extra passes over the text.
+
+score_candidate() rates how likely a candidate is the expiry date (label
+proximity, format, plausibility); rank_candidates() orders them.
+
+date_excerpt() cuts OCR text down to the lines around dates and labels
+so Gemini prompts stay within a character budget.
+"""
+
+import re
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from datetime import date
+from typing import List, Optional, Tuple
+from dateutil import parser
+from app.config import settings
+
+MONTHS = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12,
+}
+_MONTH = r'(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?'
+
+# English first (same keywords the OCR prompt and the old per-pattern
+# regexes used), then French, Spanish, German, Italian, Portuguese, Dutch.
+# Accented letters also match their unaccented OCR misreads.
+EXPIRY_LABELS = [
+    r'date\s+of\s+expiry', r'expiry\s+date', r'expiration\s+date',
+    r'expir(?:y|es|ation|ed)', r'exp\.?\s*date', r'exp',
+    r'valid\s+(?:until|thru|through|till|upto|up\s+to)', r'valid\s+to', r'end\s+date',
+    r"date\s+d'expiration", r'expire\s+le', r"valable\s+jusqu'(?:au|à|a)",
+    r'fecha\s+de\s+(?:caducidad|vencimiento|expiraci[oó]n)', r'caducidad', r'vencimiento', r'v[aá]lido\s+hasta',
+    r'g[uü]ltig\s+bis', r'ablaufdatum',
+    r'data\s+di\s+scadenza', r'scadenza', r'valido\s+fino\s+al',
+    r'data\s+de\s+validade', r'validade', r'v[aá]lido\s+at[eé]',
+    r'geldig\s+tot', r'vervaldatum',
+]
+ISSUE_LABELS = [
+    r'date\s+of\s+issue', r'issue\s+date', r'issued(?:\s+on)?', r'issue', r'doi', r'valid\s+from',
+    r'date\s+de\s+d[eé]livrance', r"date\s+d'[eé]mission", r'd[eé]livr[eé]e?\s+le',
+    r'fecha\s+de\s+(?:expedici[oó]n|emisi[oó]n)', r'expedido',
+    r'ausgestellt\s+am', r'ausstellungsdatum',
+    r'data\s+di\s+rilascio', r'rilasciat[oa]',
+    r'data\s+de\s+emiss[aã]o', r'emitido',
+    r'datum\s+van\s+afgifte', r'afgegeven',
+]
+BIRTH_LABELS = [
+    r'date\s+of\s+birth', r'birth\s+date', r'birth', r'dob', r'born',
+    r'date\s+de\s+naissance', r'n[eé]e?\s+le',
+    r'fecha\s+de\s+nacimiento', r'nacimiento',
+    r'geburtsdatum', r'geboren',
+    r'data\s+di\s+nascita', r'data\s+de\s+nascimento',
+    r'geboortedatum',
+]
+
+# Checked in this order when a text mentions several types
+DOCUMENT_TYPE_KEYWORDS = {
+    'passport': [r'passport', r'passeport', r'pasaporte', r'reisepass', r'passaporto', r'passaporte', r'paspoort'],
+    'driving_license': [
+        r'driving', r'drivers?', r"driver's", r'licen[cs]es?',
+        r'permis\s+de\s+conduire', r'(?:licencia|permiso)\s+de\s+conducir', r'carn[eé]t?\s+de\s+conducir',
+        r'f[uü]hrerschein', r'patente\s+di\s+guida', r'carta\s+de\s+condu[cç][aã]o', r'rijbewijs',
+    ],
+    'national_id': [
+        r'identity', r'national\s+id', r'citizen(?:ship)?',
+        r"carte\s+(?:nationale\s+)?d'identit[eé]", r'documento\s+nacional\s+de\s+identidad', r'dni',
+        r'personalausweis', r"carta\s+d'identit[aà]", r'identidade', r'identiteitskaart',
+    ],
+    'visa': [r'visa', r'visum', r'visto'],
+}
+
+# "No." / "Número" followed by a token with at least one digit
+NUMBER_LABELS = [r'no', r'nr', r'num', r'number', r'n°', r'num[eé]ro', r'n[uú]mero', r'nummer']
+
+def _labels(words):
+    return r'\b(?:' + '|'.join(words) + r')\b'
+
+SCANNER = re.compile(
+    r'(?P<label_expiry>' + _labels(EXPIRY_LABELS) + r')'
+    r'|(?P<label_issue>' + _labels(ISSUE_LABELS) + r')'
+    r'|(?P<label_birth>' + _labels(BIRTH_LABELS) + r')'
+    + ''.join(
+        r'|(?P<type_' + doc_type + r'>' + _labels(words) + r')'
+        for doc_type, words in DOCUMENT_TYPE_KEYWORDS.items()
+    ) +
+    # Passport No: X1234567 / Número 12-345-678
+    r'|(?P<doc_number>\b(?:' + '|'.join(NUMBER_LABELS) + r')(?![a-z])\.?\s*[:#]?\s*'
+    # (Indian DL numbers are often printed in groups: MH12 20110012345)
+    r'(?P<number>(?=[A-Z0-9\-]*\d)[A-Z0-9][A-Z0-9\-]{1,19}(?: \d[A-Z0-9\-]{1,19})*)(?![A-Z0-9/.]))'
+    # 31 Dec 2029 / 31 December, 2029
+    r'|(?P<dmy_name>(?<!\d)(?P<d1>\d{1,2})\s+(?P<mon1>' + _MONTH + r'),?\s+(?P<y1>\d{4})(?!\d))'
+    # Dec 31, 2029
+    r'|(?P<mdy_name>\b(?P<mon2>' + _MONTH + r')\s+(?P<d2>\d{1,2}),?\s+(?P<y2>\d{4})(?!\d))'
+    # 2029-12-31
+    r'|(?P<ymd>(?<!\d)(?P<y3>\d{4})[/.\-](?P<m3>\d{1,2})[/.\-](?P<d3>\d{1,2})(?!\d))'
+    # 31/12/2029, 31.12.29 (2-digit years only count next to an expiry label)
+    r'|(?P<dmy>(?<!\d)(?P<d4>\d{1,2})[/.\-](?P<m4>\d{1,2})[/.\-](?P<y4>\d{4}|\d{2})(?!\d))'
+    # 31 12 2029
+    r'|(?P<dmy_spaced>(?<!\d)(?P<d5>\d{2})\s+(?P<m5>\d{2})\s+(?P<y5>\d{4})(?!\d))'
+    # 31122029 / 20291231
+    r'|(?P<compact>(?<!\d)\d{8}(?!\d))',
+    re.IGNORECASE
+)
+
+# Shorter "numbers" are usually house numbers, counts and the like
+MIN_NUMBER_LENGTH = 5
+
+# A label applies to a date at most this far ahead (and at most one line down)
+LABEL_MAX_DISTANCE = 40
+
+
+@dataclass
+class DateCandidate:
+    """A parsed date found in OCR text"""
+    date: date
+    text: str
+    start: int
+    end: int
+    format: str
+    label: Optional[str] = None            # expiry, issue, birth
+    label_distance: Optional[int] = None   # characters between label and date
+
+
+def reference_today() -> date:
+    """Today, or OCR_REFERENCE_DATE when pinned (reproducible benchmark replays)"""
+    return settings.OCR_REFERENCE_DATE or date.today()
+
+
+def _expand_year(year_text):
+    """Two-digit years resolve to within 50 years of today (as dateutil does)"""
+    year = int(year_text)
+    if len(year_text) > 2:
+        return year
+    this_year = reference_today().year
+    year += this_year // 100 * 100
+    if year >= this_year + 50:
+        year -= 100
+    elif year < this_year - 50:
+        year += 100
+    return year
+
+
+def _fast_parse(match, kind):
+    """Format-specific parse; raises ValueError when it can't decide"""
+    g = match.group
+    if kind == 'dmy_name':
+        return date(int(g('y1')), MONTHS[g('mon1')[:3].lower()], int(g('d1')))
+    if kind == 'mdy_name':
+        return date(int(g('y2')), MONTHS[g('mon2')[:3].lower()], int(g('d2')))
+    if kind == 'ymd':
+        return date(int(g('y3')), int(g('m3')), int(g('d3')))
+    if kind == 'dmy':
+        day, month, year = int(g('d4')), int(g('m4')), _expand_year(g('y4'))
+        if month > 12 >= day:
+            day, month = month, day  # Month-first date (12/31/2029)
+        return date(year, month, day)
+    if kind == 'dmy_spaced':
+        return date(int(g('y5')), int(g('m5')), int(g('d5')))
+    if kind == 'compact':
+        digits = g('compact')
+        for year, month, day in ((digits[4:], digits[2:4], digits[:2]), (digits[:4], digits[4:6], digits[6:])):
+            try:
+                return date(int(year), int(month), int(day))
+            except ValueError:
+                continue
+    raise ValueError(f"Unparseable date: {match.group(0)}")
+
+
+def _parse(match, kind):
+    try:
+        return _fast_parse(match, kind)
+    except ValueError:
+        if kind == 'compact':
+            return None
+        try:
+            return parser.parse(match.group(0), fuzzy=True, dayfirst=True).date()
+        except (ValueError, OverflowError):
+            return None
+
+
+@dataclass
+class DocumentScan:
+    """Everything scan_document() finds in one pass"""
+    document_type: str
+    document_number: Optional[str]
+    dates: List[DateCandidate]
+
+
+def scan_document(text: str) -> DocumentScan:
+    """
+    Walk the text once for document type, number and date candidates
+
+    The type is the first of DOCUMENT_TYPE_KEYWORDS mentioned anywhere
+    ('other' when none is); the number is the first labelled one. Date
+    candidates keep their first position in the text. When the same date
+    appears more than once, the occurrence with the closest label wins.
+    """
+    candidates = {}
+    # Labels not yet attached to a date: (kind, end offset).
+    # Several in a row form a header row whose values follow in order.
+    pending_labels = []
+    types = set()
+    number = None
+
+    for match in SCANNER.finditer(text):
+        # Outer groups close last, so lastgroup names the matched alternative
+        kind = match.lastgroup
+
+        if kind.startswith('type_'):
+            types.add(kind[len('type_'):])
+            continue
+
+        if kind == 'doc_number':
+            value = match.group('number').upper()
+            if not number and len(value.replace(' ', '')) >= MIN_NUMBER_LENGTH:
+                number = value
+            continue
+
+        if kind.startswith('label_'):
+            pending_labels.append((kind[len('label_'):], match.end()))
+            continue
+
+        label, distance = _attach_label(text, pending_labels, match.start())
+
+        # 2-digit years are too ambiguous without an expiry label (e.g. "1.2.24")
+        if kind == 'dmy' and len(match.group('y4')) == 2 and label != 'expiry':
+            continue
+
+        parsed = _parse(match, kind)
+        if parsed is None:
+            continue
+
+        candidate = DateCandidate(
+            date=parsed,
+            text=match.group(0),
+            start=match.start(),
+            end=match.end(),
+            format=kind,
+            label=label,
+            label_distance=distance
+        )
+        existing = candidates.get(parsed)
+        if existing is None:
+            candidates[parsed] = candidate
+        elif label and (existing.label is None or distance < existing.label_distance):
+            existing.label, existing.label_distance = label, distance
+
+    document_type = next((t for t in DOCUMENT_TYPE_KEYWORDS if t in types), 'other')
+    return DocumentScan(document_type, number, list(candidates.values()))
+
+
+def _attach_label(text, pending_labels, date_start):
+    """
+    (label, distance) for a date, consuming the label(s) it belongs to
+
+    A label on the date's own line describes that date ("Expiry: 01/06/2035").
+    Dates on a later line take the pending labels in order, for header rows
+    like "Date of Issue   Date of Expiry" over "01/06/2025   01/06/2035".
+    A label describes one date only.
+    """
+    if not pending_labels:
+        return None, None
+
+    kind, end = pending_labels[-1]
+    if '\n' not in text[end:date_start]:
+        pending_labels.clear()
+        return _label_within_reach(text, kind, end, date_start)
+
+    while pending_labels:
+        kind, end = pending_labels.pop(0)
+        label, distance = _label_within_reach(text, kind, end, date_start)
+        if label:
+            return label, distance
+    return None, None
+
+
+def _label_within_reach(text, kind, label_end, date_start):
+    gap = text[label_end:date_start]
+    if len(gap) <= LABEL_MAX_DISTANCE and gap.count('\n') <= 1:
+        return kind, len(gap)
+    return None, None
+
+
+# Formats that leave no day/month ambiguity score higher
+FORMAT_SCORES = {
+    'dmy_name': 0.15,
+    'mdy_name': 0.15,
+    'ymd': 0.15,
+    'dmy': 0.08,          # 0.15 when the day can't be a month (31/12/2029)
+    'dmy_spaced': 0.08,
+    'compact': 0.0,       # 8 digits may just as well be a document number
+}
+
+# Same window the selection logic has always accepted
+MIN_DAYS, MAX_DAYS = -1825, 3650  # 5 years ago to 10 years in the future
+EXPIRY_CONFLICT_PENALTY = 0.4  # Expiry-labelled date earlier than another candidate
+
+
+def score_candidate(candidate: DateCandidate, today: Optional[date] = None) -> float:
+    """
+    Likelihood (0-1) that a candidate is the document's expiry date
+
+    - Label: right after "Expiry"/"Valid until" is the strongest signal and
+      fades with distance; "Issued"/"DOB" labels rule a date out
+    - Format: unambiguous formats beat 2-digit years and bare digit runs
+    - Plausibility: expiries are usually in the next 10 years, sometimes
+      recently past; anything outside MIN_DAYS..MAX_DAYS scores 0
+    """
+    today = today or reference_today()
+    days = (candidate.date - today).days
+    if not MIN_DAYS <= days <= MAX_DAYS:
+        return 0.0
+
+    score = 0.2
+    if candidate.label == 'expiry':
+        score += 0.5 - 0.2 * candidate.label_distance / LABEL_MAX_DISTANCE
+    elif candidate.label in ('issue', 'birth'):
+        score -= 0.15
+
+    format_score = FORMAT_SCORES.get(candidate.format, 0.0)
+    if candidate.format == 'dmy':
+        if len(re.split(r'[/.\-]', candidate.text)[-1]) == 2:
+            format_score = 0.05  # 2-digit year
+        elif candidate.date.day > 12:
+            format_score = 0.15  # Day can't be read as a month
+    score += format_score
+
+    if days >= 0:
+        score += 0.15
+    elif days >= -730:
+        score += 0.05  # Recently expired
+    else:
+        score -= 0.1
+
+    return round(min(max(score, 0.0), 1.0), 2)
+
+
+def rank_candidates(candidates: List[DateCandidate], today: Optional[date] = None) -> List[Tuple[DateCandidate, float]]:
+    """
+    Candidates with their scores, best first
+
+    Ties go to the earliest future date (then the most recent past date),
+    matching how expiry dates were picked before scoring existed.
+    """
+    today = today or reference_today()
+    scored = [(c, score_candidate(c, today)) for c in candidates]
+    scored = [(c, s) for c, s in scored if s > 0]
+
+    # An "Expiry" date before another plausible date is likely a mislabelled
+    # issue date (see expiry_conflict)
+    if scored:
+        latest = max(c.date for c, _ in scored)
+        scored = [
+            (c, max(0.01, round(s - EXPIRY_CONFLICT_PENALTY, 2)) if c.label == 'expiry' and c.date < latest else s)
+            for c, s in scored
+        ]
+
+    def tie_break(item):
+        candidate, score = item
+        days = (candidate.date - today).days
+        return (-score, 0 if days >= 0 else 1, days if days >= 0 else -days)
+
+    return sorted(scored, key=tie_break)
+
+
+def expiry_conflict(ranked: List[Tuple[DateCandidate, float]]) -> bool:
+    """
+    True when an expiry-labelled date is earlier than another candidate
+
+    The label was probably attached to the wrong date (OCR layouts the
+    scanner doesn't follow), so the answer needs a second opinion even if
+    it scores well.
+    """
+    if not ranked:
+        return False
+    latest = max(c.date for c, _ in ranked)
+    return any(c.label == 'expiry' and c.date < latest for c, _ in ranked)
+
+
+def ranked_confidence(ranked: List[Tuple[DateCandidate, float]]) -> float:
+    """
+    Confidence in the top candidate
+
+    Its score, reduced when a different date scores almost as well (two
+    "Expiry" dates on one document are a coin flip).
+    """
+    if not ranked:
+        return 0.0
+    top = ranked[0][1]
+    if len(ranked) > 1 and top - ranked[1][1] < 0.1:
+        top *= 0.8
+    return round(top, 2)
+
+
+# One line with its line break ("\r\r\n" counts as one)
+TEXT_LINE = re.compile(r'[^\r\n]*(?:\r*\n|\r|$)')
+
+
+def date_excerpt(text: str, budget: int, context_lines: int = 1) -> str:
+    """
+    Lines around dates and date labels, at most `budget` characters
+
+    Lines are picked by priority - expiry labels first, then other dates
+    and labels, then `context_lines` neighbours of each - and emitted in
+    their original order with "..." marking skipped text. Text without
+    any date or label is simply truncated.
+    """
+    if len(text) <= budget:
+        return text
+
+    # Offsets from the text itself: OCR.space ends lines with "\r\n" or "\r\r\n"
+    spans = [m for m in TEXT_LINE.finditer(text) if m.group()]
+    lines = [m.group() for m in spans]
+    starts = [m.start() for m in spans]
+
+    priority = {}  # line index -> 0 (expiry label), 1 (date / other label), 2 (context)
+    for match in SCANNER.finditer(text):
+        if match.lastgroup.startswith('type_') or match.lastgroup == 'doc_number':
+            continue
+        index = bisect_right(starts, match.start()) - 1
+        level = 0 if match.lastgroup == 'label_expiry' else 1
+        priority[index] = min(priority.get(index, level), level)
+        for neighbour in range(index - context_lines, index + context_lines + 1):
+            if 0 <= neighbour < len(lines) and neighbour not in priority:
+                priority[neighbour] = 2
+
+    if not priority:
+        return text[:budget]
+
+    selected, used = [], 0  # sorted line indexes, length of the excerpt they make
+    for index in sorted(priority, key=lambda i: (priority[i], i)):
+        # Expiry-label lines pull in their neighbours before other dates
+        group = [index]
+        if priority[index] == 0:
+            group += [i for i in range(index - context_lines, index + context_lines + 1) if i != index]
+        for i in group:
+            if not 0 <= i < len(lines):
+                continue
+            position = bisect_left(selected, i)
+            line = lines[i].strip()
+            if not line or (position < len(selected) and selected[position] == i):
+                continue
+            # The line's own length plus the joins to its neighbours ("\n" or
+            # "\n...\n"), minus the join it replaces between them
+            previous = selected[position - 1] if position else None
+            following = selected[position] if position < len(selected) else None
+            cost = len(line) + _join_length(previous, i) + _join_length(i, following)
+            if previous is not None and following is not None:
+                cost -= _join_length(previous, following)
+            if used + cost > budget:
+                continue
+            selected.insert(position, i)
+            used += cost
+
+    excerpt, previous = [], None
+    for i in selected:
+        if previous is not None and i != previous + 1:
+            excerpt.append("...")
+        excerpt.append(lines[i].strip())
+        previous = i
+    return "\n".join(excerpt)
+
+
+def _join_length(first, second):
+    """Characters between two kept lines in the excerpt ("..." marks skipped lines)"""
+    if first is None or second is None:
+        return 0
+    return 1 if second == first + 1 else len("\n...\n")
@@ -0,0 +1,214 @@
+"""
+Streaming multipart reader for OCR uploads
+
+FastAPI's UploadFile parameters only run the endpoint after python-multipart
+has spooled the whole body, so a 200 MB upload or a renamed .exe costs
+memory/disk before it can be rejected. The OCR endpoints read the request
+stream themselves instead:
+
+- Content-Length over the limit is refused before any body is read
+- each file part is cut off as soon as it passes MAX_UPLOAD_BYTES
+- the type comes from the file's magic bytes, not the client's headers
+"""
+
+from dataclasses import dataclass
+from typing import List, Optional
+from fastapi import Request
+from app import pdf_pages
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024  # 10MB per file
+MULTIPART_OVERHEAD_BYTES = 16 * 1024  # Boundaries and part headers
+SNIFF_BYTES = 12
+
+TYPE_ERROR = "Only JPEG/PNG/WEBP images or PDF documents allowed"
+SIZE_ERROR = "File size must be less than 10MB"
+
+
+class UploadRejected(Exception):
+    """Raised when an upload is refused; carries the HTTP status to answer with"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+@dataclass
+class Upload:
+    """One file part, read into memory (data is None when it was rejected)"""
+    filename: Optional[str]
+    content_type: Optional[str]  # Sniffed from the bytes
+    data: Optional[bytes] = None
+    error: Optional[str] = None
+
+
+def sniff_content_type(head: bytes) -> Optional[str]:
+    """Content type from a file's first bytes (None for anything not accepted)"""
+    if head[:3] == b'\xff\xd8\xff':
+        return "image/jpeg"
+    if head[:8] == b'\x89PNG\r\n\x1a\n':
+        return "image/png"
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return "image/webp"
+    if pdf_pages.is_pdf(head) and pdf_pages.is_available():
+        return "application/pdf"
+    return None
+
+
+def upload_openapi(field: str, multiple: bool = False) -> dict:
+    """openapi_extra for endpoints that read the body themselves (keeps /docs usable)"""
+    binary = {"type": "string", "format": "binary"}
+    schema = {"type": "array", "items": binary} if multiple else binary
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {"type": "object", "properties": {field: schema}, "required": [field]}
+                }
+            }
+        }
+    }
+
+
+async def read_upload(request: Request, field: str = "file", max_bytes: int = MAX_UPLOAD_BYTES) -> Upload:
+    """
+    Read a single-file upload, rejecting it as early as possible
+
+    Raises:
+        UploadRejected: 413 when too large, 400 for a missing file or a
+            type that isn't an accepted image/PDF
+    """
+    uploads = await _read_multipart(request, field, 1, max_bytes, strict=True)
+    return uploads[0]
+
+
+async def read_uploads(request: Request, field: str, max_files: int, max_bytes: int = MAX_UPLOAD_BYTES) -> List[Upload]:
+    """
+    Read a multi-file upload
+
+    Files that are too large or of the wrong type come back with `error`
+    set (and no data) so the others can still be processed. The request as
+    a whole is refused (UploadRejected) when it has no files, more than
+    max_files, or a Content-Length no batch could have.
+    """
+    return await _read_multipart(request, field, max_files, max_bytes, strict=False)
+
+
+async def _read_multipart(request, field, max_files, max_bytes, strict):
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in options:
+        raise UploadRejected(400, "Expected a multipart/form-data upload")
+
+    body_limit = max_files * (max_bytes + MULTIPART_OVERHEAD_BYTES)
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > body_limit:
+        raise UploadRejected(413, SIZE_ERROR if max_files == 1 else f"Upload must be less than {body_limit // (1024 * 1024)}MB")
+
+    reader = _PartReader(field, max_files, max_bytes, strict)
+    parser = MultipartParser(options[b"boundary"], reader.callbacks())
+
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > body_limit:
+            # Chunked uploads have no Content-Length to check up front
+            raise UploadRejected(413, SIZE_ERROR)
+        parser.write(chunk)
+    parser.finalize()
+
+    if not reader.uploads:
+        raise UploadRejected(400, "No file uploaded")
+    return reader.uploads
+
+
+class _PartReader:
+    """python-multipart callbacks that keep only the wanted file parts"""
+
+    def __init__(self, field, max_files, max_bytes, strict):
+        self.field = field
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.strict = strict
+        self.uploads: List[Upload] = []
+
+        self._headers = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._current: Optional[Upload] = None
+        self._buffer: Optional[bytearray] = None
+
+    def callbacks(self):
+        return {
+            "on_part_begin": self._part_begin,
+            "on_header_field": self._header_field_data,
+            "on_header_value": self._header_value_data,
+            "on_header_end": self._header_end,
+            "on_headers_finished": self._headers_finished,
+            "on_part_data": self._part_data,
+            "on_part_end": self._part_end,
+        }
+
+    def _part_begin(self):
+        self._headers = {}
+        self._current = None
+        self._buffer = None
+
+    def _header_field_data(self, data, start, end):
+        self._header_field += data[start:end]
+
+    def _header_value_data(self, data, start, end):
+        self._header_value += data[start:end]
+
+    def _header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = self._header_value = b""
+
+    def _headers_finished(self):
+        _, disposition = parse_options_header(self._headers.get(b"content-disposition", b""))
+        if disposition.get(b"name", b"").decode("latin-1") != self.field:
+            return  # Other form fields are skipped
+
+        if len(self.uploads) >= self.max_files:
+            raise UploadRejected(400, f"At most {self.max_files} files per batch")
+
+        filename = disposition.get(b"filename")
+        self._current = Upload(filename=filename.decode("utf-8", "replace") if filename is not None else None, content_type=None)
+        self._buffer = bytearray()
+        self.uploads.append(self._current)
+
+    def _part_data(self, data, start, end):
+        if self._buffer is None:
+            return
+        self._buffer += data[start:end]
+
+        if self._current.content_type is None and len(self._buffer) >= SNIFF_BYTES:
+            self._check_type()
+        if self._buffer is not None and len(self._buffer) > self.max_bytes:
+            self._reject(413, SIZE_ERROR)
+
+    def _part_end(self):
+        if self._buffer is None:
+            return
+        if self._current.content_type is None:
+            self._check_type()  # Files shorter than SNIFF_BYTES
+        if self._buffer is not None:
+            self._current.data = bytes(self._buffer)
+        self._buffer = None
+
+    def _check_type(self):
+        self._current.content_type = sniff_content_type(bytes(self._buffer[:SNIFF_BYTES]))
+        if self._current.content_type is None:
+            self._reject(400, TYPE_ERROR)
+
+    def _reject(self, status_code, detail):
+        if self.strict:
+            raise UploadRejected(status_code, detail)
+        # Batch: drop this file's bytes, keep reading the others
+        self._current.error = detail
+        self._buffer = None
@@ -0,0 +1,288 @@
+"""
+Webhook Notification Channel (business / enterprise tiers)
+
+Reminders are queued per endpoint and delivered from a dedicated asyncio
+loop running in a background thread:
+- One pooled httpx.AsyncClient with keep-alive shared by all endpoints
+- Reminders for the same endpoint are batched into a single signed POST
+- Per-endpoint concurrency limit and retries with exponential backoff
+
+Signature: X-DateKeeper-Signature = "sha256=" + HMAC-SHA256(secret,
+"<X-DateKeeper-Timestamp>.<raw body>"), see verify_signature().
+
+Webhook URLs are user-controlled, so the host must resolve to public
+addresses only (checked when the URL is saved and again before every
+delivery) - otherwise the server could be pointed at localhost, the
+cloud metadata endpoint (169.254.169.254) or the private network.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import ipaddress
+import json
+import logging
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import List, Optional
+from urllib.parse import urlsplit
+import httpx
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_TIERS = ("business", "enterprise")
+
+
+class UnsafeWebhookURL(ValueError):
+    """Webhook URL that isn't http(s) or resolves to a non-public address"""
+
+
+def _webhook_host(url: str) -> tuple:
+    parts = urlsplit(url)
+    if parts.scheme not in ("https", "http") or not parts.hostname:
+        raise UnsafeWebhookURL("Webhook URL must start with https:// or http://")
+    try:
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+    except ValueError:
+        raise UnsafeWebhookURL("Webhook URL has an invalid port")
+    return parts.hostname, port
+
+
+def _check_addresses(host: str, addresses: List[str]):
+    if not addresses:
+        raise UnsafeWebhookURL(f"Webhook host {host} does not resolve")
+    if settings.WEBHOOK_ALLOW_PRIVATE_HOSTS:
+        return
+    for address in addresses:
+        ip = ipaddress.ip_address(address.split("%", 1)[0])  # Strip IPv6 scope id
+        if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped:
+            ip = ip.ipv4_mapped
+        # is_global excludes loopback, link-local, private, shared (CGNAT) and reserved ranges
+        if not ip.is_global or ip.is_multicast:
+            raise UnsafeWebhookURL(f"Webhook host {host} resolves to a non-public address ({ip})")
+
+
+def validate_webhook_url(url: str):
+    """
+    Check a webhook URL before saving it (blocking DNS lookup)
+
+    Raises:
+        UnsafeWebhookURL: not http(s), unresolvable, or any resolved
+            address is loopback / link-local / private / reserved
+    """
+    host, port = _webhook_host(url)
+    try:
+        infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except (socket.gaierror, UnicodeError):
+        infos = []
+    _check_addresses(host, [info[4][0] for info in infos])
+
+
+async def validate_webhook_url_async(url: str):
+    """validate_webhook_url() for the delivery loop (non-blocking DNS lookup)"""
+    host, port = _webhook_host(url)
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except (socket.gaierror, UnicodeError):
+        infos = []
+    _check_addresses(host, [info[4][0] for info in infos])
+
+
+def sign_payload(secret: str, timestamp: str, body: bytes) -> str:
+    """Compute the signature header value for a webhook body"""
+    digest = hmac.new(
+        secret.encode(), timestamp.encode() + b"." + body, hashlib.sha256
+    ).hexdigest()
+    return f"sha256={digest}"
+
+
+def verify_signature(secret: str, timestamp: str, body: bytes, signature: str) -> bool:
+    """Verify a received webhook (for receivers and tests)"""
+    return hmac.compare_digest(sign_payload(secret, timestamp, body), signature)
+
+
+class WebhookDispatcher:
+    """Batched, pooled async delivery of reminder webhooks"""
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._started = threading.Event()
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._closed = False
+
+        # Event-loop-only state
+        self._pending = {}      # url -> (secret, [events])
+        self._semaphores = {}   # url -> asyncio.Semaphore
+        self._client: Optional[httpx.AsyncClient] = None
+
+        # Accounting (guarded by self._lock)
+        self._outstanding = 0   # events queued but not yet delivered/failed
+        self.enqueued = 0
+        self.delivered_events = 0
+        self.delivered_batches = 0
+        self.failed_events = 0
+        self.retries = 0
+        self.last_error: Optional[str] = None
+        self.last_failure_at: Optional[str] = None
+
+    # ---- Public API (any thread) ----
+
+    def submit(self, url: str, secret: str, event: dict):
+        """Queue one reminder event for an endpoint (dropped after shutdown())"""
+        self._ensure_started()
+        with self._lock:
+            if self._closed:
+                logger.warning(f"⚠️  [webhook] Dispatcher is shut down, dropping reminder for {url}")
+                return
+            self._outstanding += 1
+            self.enqueued += 1
+            # Under the lock so shutdown() can't stop the loop in between
+            self._loop.call_soon_threadsafe(self._add_event, url, secret, event)
+
+    def wait_until_idle(self, timeout: Optional[float] = None) -> bool:
+        """Block until every queued event has been delivered or given up"""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._outstanding == 0, timeout)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "pending": self._outstanding,
+                "enqueued": self.enqueued,
+                "delivered_events": self.delivered_events,
+                "delivered_batches": self.delivered_batches,
+                "failed": self.failed_events,
+                "retries": self.retries,
+                "last_error": self.last_error,
+                "last_failure_at": self.last_failure_at,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            if self._closed or not self._loop:
+                self._closed = True
+                return
+            self._closed = True
+        future = asyncio.run_coroutine_threadsafe(self._close(), self._loop)
+        try:
+            future.result(timeout=5)
+        except Exception:
+            pass
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+    # ---- Event loop side ----
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread or self._closed:
+                return
+            self._thread = threading.Thread(
+                target=self._run_loop, name="notify-webhook", daemon=True
+            )
+            self._thread.start()
+        self._started.wait()
+
+    def _run_loop(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._client = httpx.AsyncClient(
+            timeout=settings.WEBHOOK_TIMEOUT_SECONDS,
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+            headers={"User-Agent": "DateKeeper-Webhooks/1.0"},
+        )
+        self._started.set()
+        self._loop.run_forever()
+
+    async def _close(self):
+        if self._client:
+            await self._client.aclose()
+
+    def _add_event(self, url: str, secret: str, event: dict):
+        if url in self._pending:
+            self._pending[url][1].append(event)
+            if len(self._pending[url][1]) >= settings.WEBHOOK_MAX_BATCH_SIZE:
+                self._flush(url)
+            return
+
+        # First event for this endpoint opens a batch window
+        self._pending[url] = (secret, [event])
+        self._loop.call_later(settings.WEBHOOK_BATCH_WINDOW_SECONDS, self._flush, url)
+
+    def _flush(self, url: str):
+        batch = self._pending.pop(url, None)
+        if batch:
+            secret, events = batch
+            self._loop.create_task(self._deliver(url, secret, events))
+
+    async def _deliver(self, url: str, secret: str, events: list):
+        body = json.dumps({
+            "delivery_id": str(uuid.uuid4()),
+            "sent_at": datetime.utcnow().isoformat() + "Z",
+            "events": events,
+        }, separators=(",", ":")).encode()
+
+        try:
+            # Re-checked on every delivery: DNS can change after the URL was saved
+            await validate_webhook_url_async(url)
+        except UnsafeWebhookURL as e:
+            error = f"Blocked: {e}"
+        else:
+            error = await self._post(url, secret, body)
+
+        with self._idle:
+            if error is None:
+                self.delivered_events += len(events)
+                self.delivered_batches += 1
+            else:
+                self.failed_events += len(events)
+                self.last_error = error
+                self.last_failure_at = datetime.now().isoformat()
+            self._outstanding -= len(events)
+            self._idle.notify_all()
+
+        if error is None:
+            logger.info(f"✅ [webhook] Delivered {len(events)} reminder(s) to {url}")
+        else:
+            logger.warning(f"⚠️  [webhook] Failed to deliver {len(events)} reminder(s) to {url} ({error})")
+
+    async def _post(self, url: str, secret: str, body: bytes) -> Optional[str]:
+        """POST one batch with retries; returns the last error (None on success)"""
+        semaphore = self._semaphores.setdefault(
+            url, asyncio.Semaphore(settings.WEBHOOK_MAX_CONCURRENCY_PER_ENDPOINT)
+        )
+        error = None
+        async with semaphore:
+            for attempt in range(settings.WEBHOOK_MAX_RETRIES + 1):
+                if attempt:
+                    with self._lock:
+                        self.retries += 1
+                    await asyncio.sleep(settings.WEBHOOK_RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+
+                timestamp = str(int(time.time()))
+                try:
+                    response = await self._client.post(url, content=body, headers={
+                        "Content-Type": "application/json",
+                        "X-DateKeeper-Timestamp": timestamp,
+                        "X-DateKeeper-Signature": sign_payload(secret, timestamp, body),
+                    })
+                except httpx.HTTPError as e:
+                    error = f"{type(e).__name__}: {e}"
+                    continue
+
+                if response.status_code < 300:
+                    return None
+                error = f"HTTP {response.status_code}"
+                # Client errors (except rate limiting) won't succeed on retry
+                if response.status_code < 500 and response.status_code != 429:
+                    break
+        return error
+
+
+# Singleton instance
+webhook_dispatcher = WebhookDispatcher()
@@ -0,0 +1,279 @@
+"""
+Offline OCR pipeline benchmark
+
+Replays the recorded OCR.space / Gemini responses in ocr_benchmark/corpus.json
+through OCRService.process_document_async (httpx MockTransport, no network)
+and reports expiry / document type accuracy, per-stage latency and external
+calls per document.
+
+"Today" is pinned to the corpus's reference_date so date plausibility
+scoring gives the same results whenever the benchmark runs. A replayed
+Gemini answer only counts when the prompt actually contains the expiry
+date as printed (the case's expiry_text) - otherwise the replay answers
+NONE and the case fails, so prompt / excerpt regressions show up.
+
+    python benchmark_ocr.py                        # CPU-only stages, instant API replies
+    python benchmark_ocr.py --latency              # also sleep the recorded API latencies
+    python benchmark_ocr.py --save baseline.json   # store per-case results
+    python benchmark_ocr.py --compare baseline.json  # exit 1 on accuracy regressions
+"""
+import argparse
+import asyncio
+import io
+import json
+import logging
+import os
+import statistics
+import sys
+from collections import Counter, defaultdict
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+from PIL import Image, ImageDraw
+
+from app.config import settings
+from app.ocr_metrics import STAGES
+from app.ocr_service import OCRService
+from app.process_pool import shutdown_process_pool
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ocr_benchmark", "corpus.json")
+
+
+def load_corpus(path=CORPUS_PATH):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def phone_photo(case_id):
+    """A phone-camera-sized JPEG, unique per case so the result cache never hits"""
+    image = Image.new("RGB", (2400, 1600), (236, 232, 220))
+    ImageDraw.Draw(image).text((100, 100), case_id, fill=(20, 20, 20))
+    output = io.BytesIO()
+    image.save(output, format="JPEG", quality=90)
+    return output.getvalue()
+
+
+NO_ANSWER = {"latency_ms": 0, "response": {"candidates": [{"content": {"parts": [{"text": "NONE"}]}}]}}
+
+
+class Replay:
+    """MockTransport handler answering with the current case's recordings"""
+
+    def __init__(self, simulate_latency=False):
+        self.simulate_latency = simulate_latency
+        self.case = None
+        self.calls = Counter()
+        self.unrecorded = Counter()
+        self.prompt_misses = set()  # Case ids whose Gemini prompt lacked the expiry date
+
+    async def __call__(self, request):
+        await request.aread()
+        host = request.url.host
+        if "ocr.space" in host:
+            service = "ocr_space"
+        elif "generativelanguage" in host:
+            service = "gemini"
+        else:
+            service = host
+        self.calls[service] += 1
+
+        recording = self.case.get(service)
+        if service == "gemini" and recording and not self._prompt_has_expiry(request):
+            self.prompt_misses.add(self.case["id"])
+            recording = NO_ANSWER
+        if recording is None:
+            self.unrecorded[service] += 1
+            if service == "gemini":
+                recording = NO_ANSWER
+            else:
+                return httpx.Response(503, json={"error": f"No recording for {service}"})
+
+        if self.simulate_latency:
+            await asyncio.sleep(recording["latency_ms"] / 1000)
+        return httpx.Response(200, json=recording["response"])
+
+    def _prompt_has_expiry(self, request):
+        """Is the expiry date, as printed, in the OCR text part of the prompt?"""
+        expected = self.case.get("expiry_text")
+        if not expected:
+            return True
+        prompt = json.loads(request.content)["contents"][0]["parts"][0]["text"]
+        # Skip the instructions' own example dates
+        excerpt = prompt.split("OCR Text:", 1)[-1].split("Instructions:", 1)[0]
+        return expected in excerpt
+
+
+class StageCapture(logging.Handler):
+    """Collects the per-document stage timings the pipeline logs (see app/ocr_metrics.py)"""
+
+    def __init__(self):
+        super().__init__(logging.INFO)
+        self.documents = []
+
+    def emit(self, record):
+        stages = getattr(record, "ocr_stages", None)
+        if stages is not None:
+            self.documents.append(stages)
+
+
+async def run(corpus, simulate_latency=False):
+    cases = corpus["cases"]
+    # Offline, in-memory and deterministic: only the recorded provider, fixed "today"
+    settings.OCR_REFERENCE_DATE = date.fromisoformat(corpus["reference_date"])
+    settings.OCR_PROVIDERS = "ocr_space"
+    settings.OCR_LOCAL_ENGINE_MODE = "off"
+    settings.OCR_RESULT_CACHE_DIR = None
+
+    service = OCRService()
+    service.gemini_key = "benchmark"
+    replay = Replay(simulate_latency)
+    service._http_clients[asyncio.get_running_loop()] = (httpx.AsyncClient(transport=httpx.MockTransport(replay)), None)
+
+    # Start the process pool outside the measurements
+    await service.preprocess_image_async(phone_photo("warm-up"))
+
+    capture = StageCapture()
+    logging.getLogger("app.ocr_metrics").addHandler(capture)
+
+    timings = defaultdict(list)
+    results = []
+    for case in cases:
+        image = phone_photo(case["id"])
+        replay.case = case
+        calls_before = sum(replay.calls.values())
+
+        result = await service.process_document_async(image, f"{case['id']}.jpg", "image/jpeg")
+        stages = capture.documents[-1]
+        for stage, duration_ms in stages.items():
+            timings[stage].append(duration_ms)
+
+        results.append({
+            "id": case["id"],
+            "expected_expiry": case["expiry_date"],
+            "expiry_date": result["expiry_date"],
+            "expiry_correct": result["expiry_date"] == case["expiry_date"] and case["id"] not in replay.prompt_misses,
+            "prompt_ok": case["id"] not in replay.prompt_misses,
+            "expected_type": case["document_type"],
+            "document_type": result["document_type"],
+            "type_correct": result["document_type"] == case["document_type"],
+            "method": result["method"],
+            "confidence": result["confidence"],
+            "external_calls": sum(replay.calls.values()) - calls_before,
+            "stages": stages,
+        })
+
+    logging.getLogger("app.ocr_metrics").removeHandler(capture)
+    await service.aclose()
+    return results, timings, replay
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def report(results, timings, replay):
+    count = len(results)
+    expiry_ok = sum(r["expiry_correct"] for r in results)
+    type_ok = sum(r["type_correct"] for r in results)
+
+    print("=" * 70)
+    print("OCR PIPELINE BENCHMARK (offline replay)")
+    print("=" * 70)
+
+    print(f"\n🎯 Accuracy ({count} documents):")
+    print(f"   Expiry date:   {expiry_ok}/{count} ({expiry_ok / count:.0%})")
+    print(f"   Document type: {type_ok}/{count} ({type_ok / count:.0%})")
+
+    by_type = defaultdict(lambda: [0, 0])
+    for r in results:
+        by_type[r["expected_type"]][0] += r["expiry_correct"]
+        by_type[r["expected_type"]][1] += 1
+    for doc_type, (ok, total) in sorted(by_type.items()):
+        print(f"   - {doc_type:<16} expiry {ok}/{total}")
+
+    methods = Counter(r["method"] for r in results)
+    print(f"\n🧭 Answered by: " + ", ".join(f"{method} {n}" for method, n in methods.most_common()))
+
+    print(f"\n⏱️  Stage latency (ms):")
+    print(f"   {'stage':<11}{'docs':>6}{'mean':>10}{'p50':>10}{'p95':>10}")
+    for stage in STAGES:
+        values = timings.get(stage, [])
+        if not values:
+            continue
+        print(f"   {stage:<11}{len(values):>6}{statistics.mean(values):>10.2f}"
+              f"{percentile(values, 0.5):>10.2f}{percentile(values, 0.95):>10.2f}")
+
+    print(f"\n🌐 External calls: {sum(replay.calls.values()) / count:.2f} per document")
+    for service, n in replay.calls.most_common():
+        print(f"   - {service:<10} {n} ({n / count:.2f}/doc)")
+    if replay.unrecorded:
+        print(f"   ⚠️  Unrecorded calls: {dict(replay.unrecorded)}")
+    if replay.prompt_misses:
+        print(f"   ❌ Gemini prompt missing the expiry date: {', '.join(sorted(replay.prompt_misses))}")
+
+    misses = [r for r in results if not (r["expiry_correct"] and r["type_correct"])]
+    if misses:
+        print(f"\n❌ Misses:")
+        for r in misses:
+            print(f"   {r['id']:<26} expiry {r['expiry_date']} (want {r['expected_expiry']}), "
+                  f"type {r['document_type']} (want {r['expected_type']}), via {r['method']}"
+                  + ("" if r["prompt_ok"] else ", prompt lacked the expiry date"))
+
+    print("\n" + "=" * 70)
+
+
+def compare(results, baseline_path):
+    """Print cases that got worse than the baseline; True when there are none"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {r["id"]: r for r in json.load(f)["results"]}
+
+    regressions = []
+    for r in results:
+        before = baseline.get(r["id"])
+        if not before:
+            continue
+        for field in ("expiry_correct", "type_correct"):
+            if before[field] and not r[field]:
+                regressions.append(f"{r['id']}: {field.replace('_correct', '')} was right, now wrong")
+        if r["external_calls"] > before["external_calls"]:
+            print(f"   ℹ️  {r['id']}: {before['external_calls']} → {r['external_calls']} external calls")
+
+    if regressions:
+        print(f"\n❌ Accuracy regressions vs {baseline_path}:")
+        for line in regressions:
+            print(f"   {line}")
+        return False
+    print(f"\n✅ No accuracy regressions vs {baseline_path}")
+    return True
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Offline OCR pipeline benchmark")
+    arg_parser.add_argument("--corpus", default=CORPUS_PATH)
+    arg_parser.add_argument("--latency", action="store_true", help="Sleep the recorded API latencies")
+    arg_parser.add_argument("--verbose", action="store_true", help="Show the pipeline's debug log")
+    arg_parser.add_argument("--save", metavar="FILE", help="Write per-case results as JSON")
+    arg_parser.add_argument("--compare", metavar="FILE", help="Fail on accuracy regressions vs a saved run")
+    args = arg_parser.parse_args()
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING)
+    metrics_logger = logging.getLogger("app.ocr_metrics")
+    metrics_logger.setLevel(logging.DEBUG if args.verbose else logging.INFO)
+    metrics_logger.propagate = args.verbose  # StageCapture still gets the summaries
+    try:
+        results, timings, replay = asyncio.run(run(load_corpus(args.corpus), args.latency))
+    finally:
+        shutdown_process_pool()
+
+    report(results, timings, replay)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({"results": results}, f, indent=2)
+        print(f"💾 Saved results to {args.save}")
+
+    if args.compare and not compare(results, args.compare):
+        sys.exit(1)
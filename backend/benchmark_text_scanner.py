@@ -0,0 +1,139 @@
+"""Benchmark the single-pass document scanner against the old 12-regex extraction + keyword checks"""
+import os
+import re
+import sys
+import time
+from datetime import datetime
+from dateutil import parser
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.text_scanner import scan_document
+
+# Synthetic OCR output shaped like the documents users upload
+CORPUS = [
+    """REPUBLIC OF INDIA
+    PASSPORT
+    Surname SHARMA  Given Names RAHUL
+    Date of Birth 14/03/1990  Place of Birth DELHI
+    Date of Issue 02/01/2020
+    Date of Expiry 01/01/2030
+    P<INDSHARMA<<RAHUL<<<<<<<<<<<<<<<<<<<<<<<<<<
+    K1234567<4IND9003149M3001015<<<<<<<<<<<<<<02""",
+    """DRIVING LICENCE
+    DL No. MH12 20110012345
+    Issue Date: 15-06-2021  Valid Till: 14-06-2041
+    DOB: 22.11.1985
+    Blood Group: O+""",
+    """UNITED STATES OF AMERICA
+    VISA
+    Issue Date 05 MAR 2024   Expiration Date 04 MAR 2034
+    Entries M  Annotation STUDENT""",
+    """NATIONAL IDENTITY CARD
+    Citizen: JANE DOE
+    Born: June 3, 1992
+    Expires: Dec 5, 2027
+    Card No 20271205 0042""",
+    """INSURANCE CERTIFICATE
+    Policy start 2025/04/01 Policy end 2026/03/31
+    Printed 2025-03-28 10:42""",
+    """Receipt #20250311
+    Thank you for shopping. Items 3  Total 41.20
+    Exp 12/31/29""",
+]
+
+# The per-pattern loop the scanner replaced
+LEGACY_PATTERNS = [
+    r'expir[ye].*?date.*?[:\s]*(\d{1,2}[/.\-]\d{1,2}[/.\-]\d{2,4})',
+    r'expir[ye].*?[:\s]*(\d{1,2}[/.\-]\d{1,2}[/.\-]\d{2,4})',
+    r'exp.*?date.*?[:\s]*(\d{1,2}[/.\-]\d{1,2}[/.\-]\d{2,4})',
+    r'valid.*?until.*?[:\s]*(\d{1,2}[/.\-]\d{1,2}[/.\-]\d{2,4})',
+    r'valid.*?thru.*?[:\s]*(\d{1,2}[/.\-]\d{1,2}[/.\-]\d{2,4})',
+    r'date.*?of.*?expiry.*?[:\s]*(\d{1,2}[/.\-]\d{1,2}[/.\-]\d{2,4})',
+    r'(\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{4})',
+    r'((?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{1,2},?\s+\d{4})',
+    r'(\d{1,2}[/.\-]\d{1,2}[/.\-]\d{4})',
+    r'(\d{4}[/.\-]\d{1,2}[/.\-]\d{1,2})',
+    r'(\d{2}\s+\d{2}\s+\d{4})',
+    r'(\d{8})',
+]
+
+
+def legacy_scan(text):
+    dates = []
+    for pattern in LEGACY_PATTERNS:
+        for match in re.finditer(pattern, text, re.IGNORECASE):
+            date_str = match.group(1)
+            parsed = None
+            try:
+                if len(date_str) == 8 and date_str.isdigit():
+                    for fmt in ('%d%m%Y', '%Y%m%d'):
+                        try:
+                            parsed = datetime.strptime(date_str, fmt)
+                            break
+                        except ValueError:
+                            pass
+                else:
+                    parsed = parser.parse(date_str, fuzzy=True, dayfirst=True)
+            except (ValueError, OverflowError):
+                continue
+            if parsed:
+                dates.append(parsed.date())
+    return dates
+
+
+def legacy_document_type(text):
+    """The old detect_document_type keyword checks"""
+    text_lower = text.lower()
+    if any(word in text_lower for word in ['passport', 'passeport', 'pasaporte']):
+        return 'passport'
+    elif any(word in text_lower for word in ['driving', 'driver', 'license', 'licence']):
+        return 'driving_license'
+    elif any(word in text_lower for word in ['identity', 'national id', 'citizen']):
+        return 'national_id'
+    elif any(word in text_lower for word in ['visa']):
+        return 'visa'
+    return 'other'
+
+
+def legacy_extract(text):
+    return legacy_scan(text), legacy_document_type(text)
+
+
+def bench(func, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for text in CORPUS:
+            func(text)
+    elapsed = time.perf_counter() - start
+    return rounds * len(CORPUS) / elapsed
+
+
+if __name__ == "__main__":
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+
+    print("=" * 60)
+    print("DOCUMENT SCANNER BENCHMARK")
+    print("=" * 60)
+    print(f"\n📄 Corpus: {len(CORPUS)} texts x {rounds} rounds")
+
+    legacy_candidates = sum(len(legacy_scan(t)) for t in CORPUS)
+    new_candidates = sum(len(scan_document(t).dates) for t in CORPUS)
+    print(f"\n🔎 Candidates parsed per corpus pass:")
+    print(f"   Legacy 12-regex: {legacy_candidates}")
+    print(f"   Single-pass:     {new_candidates} (de-duplicated)")
+
+    legacy_rate = bench(legacy_extract, rounds)
+    new_rate = bench(scan_document, rounds)
+    print(f"\n⏱️  Throughput (dates + document type):")
+    print(f"   Legacy 12-regex: {legacy_rate:,.0f} docs/sec")
+    print(f"   Single-pass:     {new_rate:,.0f} docs/sec ({new_rate / legacy_rate:.1f}x)")
+
+    print("\n🏷️  Labelled candidates:")
+    for text in CORPUS:
+        scan = scan_document(text)
+        print(f"   [{scan.document_type}] number={scan.document_number or '-'} (was {legacy_document_type(text)})")
+        for c in scan.dates:
+            print(f"   {c.date}  {c.format:<10} {c.label or '-':<7} '{c.text}'")
+
+    print("\n" + "=" * 60)
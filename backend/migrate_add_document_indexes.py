@@ -0,0 +1,56 @@
+"""
+Database Migration: Add composite indexes to documents table
+
+Adds:
+- idx_documents_user_expiry_id: (user_id, expiry_date, id) for the
+  keyset-paginated document list
+- idx_documents_user_status: (user_id, status) for the dashboard stats
+
+New databases get it from the model; Supabase users run the matching
+statement in supabase_schema.sql.
+"""
+
+import sqlite3
+
+INDEXES = {
+    "idx_documents_user_expiry_id": "documents(user_id, expiry_date, id)",
+    "idx_documents_user_status": "documents(user_id, status)",
+}
+
+# Connect to database
+conn = sqlite3.connect('documents.db')
+cursor = conn.cursor()
+
+print("=" * 60)
+print("DATABASE MIGRATION: Add Document Indexes")
+print("=" * 60)
+
+try:
+    cursor.execute("PRAGMA index_list(documents)")
+    existing = [index[1] for index in cursor.fetchall()]
+    
+    for name, target in INDEXES.items():
+        if name not in existing:
+            print(f"\n✅ Creating index '{name}'...")
+            cursor.execute(f"CREATE INDEX {name} ON {target}")
+            print(f"   Index '{name}' created successfully")
+        else:
+            print(f"\n⏭️  Index '{name}' already exists")
+    
+    # Refresh planner statistics so the new index is picked up
+    cursor.execute("ANALYZE documents")
+    
+    # Commit changes
+    conn.commit()
+    
+    print("\n" + "=" * 60)
+    print("✅ MIGRATION COMPLETED SUCCESSFULLY")
+    print("=" * 60)
+    
+except sqlite3.Error as e:
+    print(f"\n❌ Migration failed: {e}")
+    conn.rollback()
+finally:
+    conn.close()
+
+print("\nYou can now restart the backend server")
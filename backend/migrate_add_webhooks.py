@@ -0,0 +1,47 @@
+"""
+Database Migration: Add webhook channel to users table
+
+Adds:
+- webhook_url: Endpoint receiving reminder webhooks (business/enterprise)
+- webhook_secret: HMAC secret used to sign webhook deliveries
+"""
+
+import sqlite3
+
+# Connect to database
+conn = sqlite3.connect('documents.db')
+cursor = conn.cursor()
+
+print("=" * 60)
+print("DATABASE MIGRATION: Add Webhook Channel")
+print("=" * 60)
+
+try:
+    # Check if columns already exist
+    cursor.execute("PRAGMA table_info(users)")
+    columns = [column[1] for column in cursor.fetchall()]
+    
+    for name in ('webhook_url', 'webhook_secret'):
+        if name not in columns:
+            print(f"\n✅ Adding '{name}' column...")
+            cursor.execute(f"ALTER TABLE users ADD COLUMN {name} TEXT")
+            print(f"   Column '{name}' added successfully")
+        else:
+            print(f"\n⏭️  Column '{name}' already exists")
+    
+    # Commit changes
+    conn.commit()
+    
+    print("\n" + "=" * 60)
+    print("✅ MIGRATION COMPLETED SUCCESSFULLY")
+    print("=" * 60)
+    
+except sqlite3.Error as e:
+    print(f"\n❌ Migration failed: {e}")
+    conn.rollback()
+finally:
+    conn.close()
+
+print("\nYou can now:")
+print("1. Restart the backend server")
+print("2. Set a webhook URL in Settings (Business/Enterprise plans)")
@@ -17,6 +17,10 @@ CREATE TABLE IF NOT EXISTS users (
     notify_sms VARCHAR(1) DEFAULT 'N',
     alternate_email VARCHAR(255),
     
+    -- Webhook channel (business / enterprise tiers)
+    webhook_url VARCHAR(500),
+    webhook_secret VARCHAR(64),
+    
     -- Reminder preferences (JSON)
     reminder_intervals TEXT,
     
@@ -38,6 +42,10 @@ CREATE TABLE IF NOT EXISTS users (
 -- Create index on email for faster lookups
 CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
 
+-- Existing databases: add webhook columns
+ALTER TABLE users ADD COLUMN IF NOT EXISTS webhook_url VARCHAR(500);
+ALTER TABLE users ADD COLUMN IF NOT EXISTS webhook_secret VARCHAR(64);
+
 -- ============================================
 -- DOCUMENTS TABLE
 -- ============================================
@@ -66,6 +74,29 @@ CREATE TABLE IF NOT EXISTS documents (
 CREATE INDEX IF NOT EXISTS idx_documents_user_id ON documents(user_id);
 CREATE INDEX IF NOT EXISTS idx_documents_expiry_date ON documents(expiry_date);
 CREATE INDEX IF NOT EXISTS idx_documents_status ON documents(status);
+CREATE INDEX IF NOT EXISTS idx_documents_user_expiry_id ON documents(user_id, expiry_date, id);
+CREATE INDEX IF NOT EXISTS idx_documents_user_status ON documents(user_id, status);
+
+-- ============================================
+-- NOTIFICATIONS TABLE (in-app feed)
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS notifications (
+    id SERIAL PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    document_id TEXT,
+    kind VARCHAR(30) NOT NULL,
+    title VARCHAR(255) NOT NULL,
+    message TEXT,
+    is_read BOOLEAN NOT NULL DEFAULT FALSE,
+    
+    -- Timestamps
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Unread badge count and SSE catch-up queries
+CREATE INDEX IF NOT EXISTS idx_notifications_user_unread ON notifications(user_id, is_read);
+CREATE INDEX IF NOT EXISTS idx_notifications_user_id_id ON notifications(user_id, id);
 
 -- ============================================
 -- FOREIGN KEY CONSTRAINTS
@@ -0,0 +1,59 @@
+"""Test OCR admission control: bounded requests vs background jobs (no network)"""
+import os
+import sys
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.admission import AdmissionController, AdmissionRejected
+
+ok = True
+
+def check(condition, message):
+    global ok
+    print(f"   {'✅' if condition else '❌'} {message}")
+    ok = ok and condition
+
+
+async def hold(admission, seconds, bounded=True):
+    async with admission.slot(bounded=bounded):
+        await asyncio.sleep(seconds)
+    return "done"
+
+
+async def main():
+    print("\n⏳ One slot busy for 1s, requests may wait 0.2s:")
+    admission = AdmissionController(max_concurrency=1, max_queue=1, max_wait_seconds=0.2)
+    busy = asyncio.create_task(hold(admission, 1.0))
+    await asyncio.sleep(0)
+
+    try:
+        await hold(admission, 0)
+        check(False, "Request admitted despite the busy slot")
+    except AdmissionRejected as e:
+        check(True, f"Request gives up after max_wait ({e})")
+
+    job = asyncio.create_task(hold(admission, 0, bounded=False))
+    extra_job = asyncio.create_task(hold(admission, 0, bounded=False))
+    await asyncio.sleep(0.4)
+    check(not job.done(), "Job still waiting past max_wait")
+    check(admission.waiting == 2, "Jobs queue beyond max_queue")
+
+    results = await asyncio.wait_for(asyncio.gather(busy, job, extra_job), timeout=5)
+    check(results == ["done"] * 3, "Jobs complete once the slot frees up")
+
+    stats = admission.stats()
+    check(stats["timed_out"] == 1 and stats["rejected"] == 1, f"Only the request counts as timed out: {stats}")
+    check(stats["in_flight"] == 0 and stats["queue_depth"] == 0, "All slots released")
+
+
+print("=" * 60)
+print("TESTING OCR ADMISSION CONTROL")
+print("=" * 60)
+
+asyncio.run(main())
+
+print("\n" + "=" * 60)
+print("✅ Admission control works!" if ok else "❌ Admission control test failed")
+print("=" * 60)
+sys.exit(0 if ok else 1)
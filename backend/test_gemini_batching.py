@@ -0,0 +1,81 @@
+"""Test batched Gemini calls: batch windows and failure counters (fake Gemini, no network)"""
+import os
+import sys
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.config import settings
+from app.ocr_service import OCRService, GeminiCoalescer
+
+ok = True
+
+def check(condition, message):
+    global ok
+    print(f"   {'✅' if condition else '❌'} {message}")
+    ok = ok and condition
+
+
+class FakeService:
+    """Records the size of every batch it is sent"""
+
+    def __init__(self):
+        self.batches = []
+
+    async def extract_expiry_batch_async(self, texts, scans):
+        self.batches.append(len(texts))
+        return [("2030-01-01", 0.75, "gemini")] * len(texts)
+
+
+async def window_checks():
+    print("\n🪟 Size-triggered flush, then a new window:")
+    settings.GEMINI_BATCH_SIZE = 3
+    settings.GEMINI_BATCH_WINDOW_SECONDS = 0.3
+    service = FakeService()
+    coalescer = GeminiCoalescer(service)
+
+    async def later(delay, text):
+        await asyncio.sleep(delay)
+        return await coalescer.extract(text)
+
+    # 3 texts fill a batch at once; 2 more arrive 0.2s / 0.35s later, after
+    # the first window's timer would have fired
+    results = await asyncio.gather(*[later(0, f"t{i}") for i in range(3)], later(0.2, "t3"), later(0.35, "t4"))
+    check(all(r[0] == "2030-01-01" for r in results), "Every text answered")
+    check(service.batches == [3, 2], f"Second window collects both late texts (batches {service.batches})")
+    check(not coalescer._deliveries, "Delivery tasks released when done")
+
+
+async def failure_checks():
+    print("\n💥 Batched call failures vs invalid entries:")
+    service = OCRService()
+    chunk = [(i, 10, f"excerpt {i}", f"key {i}", (None, 0.0, [])) for i in range(3)]
+
+    async def down(excerpts):
+        raise Exception("503 Service Unavailable")
+    service._call_gemini_batch = down
+    results = {}
+    await service._extract_gemini_chunk(chunk, results)
+    check(len(results) == 3, "Failed call falls back to the scanner for every entry")
+    check(service.gemini_batch_failures == 1 and service.gemini_invalid_entries == 0,
+          "Counted as one failed call, not invalid entries")
+
+    async def partial(excerpts):
+        return {0: "2030-01-01"}
+    service._call_gemini_batch = partial
+    await service._extract_gemini_chunk(chunk, {})
+    check(service.gemini_invalid_entries == 2 and service.gemini_batch_failures == 1,
+          "Missing answers counted as invalid entries")
+
+
+print("=" * 60)
+print("TESTING BATCHED GEMINI CALLS")
+print("=" * 60)
+
+asyncio.run(window_checks())
+asyncio.run(failure_checks())
+
+print("\n" + "=" * 60)
+print("✅ Gemini batching works!" if ok else "❌ Gemini batching test failed")
+print("=" * 60)
+sys.exit(0 if ok else 1)
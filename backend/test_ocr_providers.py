@@ -0,0 +1,136 @@
+"""Test OCR provider circuit breakers and failover (fake providers, no network)"""
+import os
+import sys
+import time
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.ocr_providers import CircuitBreaker, OCRProvider, ProviderRouter, ProviderUnavailable, OCRInputError
+
+ok = True
+
+def check(condition, message):
+    global ok
+    print(f"   {'✅' if condition else '❌'} {message}")
+    ok = ok and condition
+
+
+class FakeProvider(OCRProvider):
+    def __init__(self, name, text="", error=None, delay=0.0):
+        super().__init__()
+        self.name = name
+        self.text = text
+        self.error = error
+        self.delay = delay
+
+    async def extract(self, image, filename, content_type):
+        await asyncio.sleep(self.delay)
+        if isinstance(self.error, Exception):
+            raise self.error
+        if self.error:
+            raise ProviderUnavailable(self.error)
+        return self.text
+
+
+def trip(breaker):
+    """Open a breaker and fast-forward past its cool-down"""
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    breaker.opened_at = time.monotonic() - breaker.reset_seconds
+
+
+print("=" * 60)
+print("TESTING OCR PROVIDER BREAKERS")
+print("=" * 60)
+
+print("\n🔌 Circuit breaker states:")
+breaker = CircuitBreaker(failure_threshold=3, reset_seconds=30)
+check(breaker.state == "closed" and breaker.allow(), "Starts closed")
+breaker.record_failure()
+breaker.record_failure()
+check(breaker.state == "closed", "Stays closed below the threshold")
+breaker.record_failure()
+check(breaker.state == "open" and not breaker.allow(), "Opens after 3 consecutive failures")
+
+breaker.opened_at = time.monotonic() - 30
+check(breaker.state == "half_open", "Half-open after the cool-down")
+check(breaker.allow(), "First caller gets the half-open trial")
+check(not breaker.allow() and not breaker.available(), "Only one trial at a time")
+breaker.record_success()
+check(breaker.state == "closed" and breaker.allow(), "Successful trial closes the breaker")
+
+trip(breaker)
+breaker.allow()
+breaker.record_failure()
+check(breaker.state == "open", "Failed trial re-opens the breaker")
+
+trip(breaker)
+breaker.allow()
+breaker.release()
+check(breaker.available() and breaker.allow(), "Released (cancelled) trial can be claimed again")
+
+
+async def router_checks():
+    router = ProviderRouter(lambda: None)
+
+    print("\n🔀 Router with a half-open fallback provider:")
+    primary = FakeProvider("primary", text="PASSPORT")
+    fallback = FakeProvider("fallback", text="FALLBACK")
+    router.providers = [primary, fallback]
+    trip(fallback.breaker)
+
+    text = await router.extract(b"image")
+    check(text == "PASSPORT", "Primary answers")
+    check(fallback.calls == 0, "Fallback was never launched")
+    check(fallback.breaker.available(), "Fallback's half-open trial was not claimed")
+
+    primary.error = "down"
+    text = await router.extract(b"image")
+    check(text == "FALLBACK", "Fails over to the half-open fallback")
+    check(fallback.breaker.state == "closed", "Fallback's successful trial closed its breaker")
+
+    print("\n🔀 Router with every breaker open:")
+    trip(primary.breaker)
+    primary.breaker.opened_at = time.monotonic()
+    fallback.breaker.record_failure()
+    fallback.breaker.opened_at = time.monotonic()
+    try:
+        await router.extract(b"image")
+        check(False, "Should raise when all circuits are open")
+    except Exception as e:
+        check("circuit open" in str(e), f"Raises: {e}")
+
+    print("\n🖼️  Documents the provider can't read:")
+    primary, fallback = FakeProvider("primary"), FakeProvider("fallback", text="FALLBACK")
+    router.providers = [primary, fallback]
+    primary.error = OCRInputError("E301: corrupt image")
+    for _ in range(primary.breaker.failure_threshold + 1):
+        try:
+            await router.extract(b"image")
+            check(False, "Unreadable document should fail the request")
+        except OCRInputError:
+            pass
+    check(primary.breaker.state == "closed", "Bad uploads don't open the breaker")
+    check(fallback.calls == 0, "Not retried on the next provider")
+    check(primary.stats()["input_errors"] == primary.breaker.failure_threshold + 1, "Counted as input errors")
+
+    primary.error = Exception("403 invalid API key")
+    check(await router.extract(b"image") == "FALLBACK", "Other errors still fail over")
+    check(primary.breaker.consecutive_failures == 0, "... without counting against the breaker")
+
+    print("\n🏁 Race mode hedges:")
+    router.local_mode = "race"
+    local = FakeProvider("local", text="LOCAL", delay=0.05)
+    remote = FakeProvider("ocr_space", text="REMOTE", delay=0.01)
+    router.providers = [remote, local]
+    hedges = router.hedges
+    check(await router.extract(b"image") == "REMOTE", "Faster provider wins the race")
+    check(local.calls == 1 and router.hedges == hedges + 1, f"Race launch counted as a hedge ({router.hedges - hedges})")
+
+asyncio.run(router_checks())
+
+print("\n" + "=" * 60)
+print("✅ Provider breakers work!" if ok else "❌ Provider breaker test failed")
+print("=" * 60)
+sys.exit(0 if ok else 1)
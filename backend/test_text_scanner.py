@@ -0,0 +1,55 @@
+"""Test the Gemini prompt excerpt and header-row labels (pure text, no network)"""
+import os
+import sys
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.text_scanner import scan_document, rank_candidates, date_excerpt
+
+TODAY = date(2026, 10, 19)
+ok = True
+
+def check(condition, message):
+    global ok
+    print(f"   {'✅' if condition else '❌'} {message}")
+    ok = ok and condition
+
+
+def filler(count, start=0):
+    return [f"Line {i} of the scanned text" for i in range(start, start + count)]
+
+
+print("=" * 60)
+print("TESTING TEXT SCANNER")
+print("=" * 60)
+
+print("\n✂️  Prompt excerpt line breaks:")
+lines = filler(50) + ["Date of Expiry 01/06/2035"] + filler(9, start=51)
+for name, newline in (("\\n", "\n"), ("\\r\\n", "\r\n"), ("\\r\\r\\n", "\r\r\n")):
+    excerpt = date_excerpt(newline.join(lines), budget=150)
+    check(excerpt == "\n".join(lines[49:52]), f"{name}: expiry line and its neighbours, got {excerpt.splitlines()}")
+
+print("\n📏 Prompt excerpt budget:")
+# Dates every 5th line: every kept line after the first needs a "..." separator
+lines = [f"Issued 0{i % 9 + 1}/06/2025" if i % 5 == 0 else f"Line {i} of the scanned text" for i in range(200)]
+for budget in (60, 150, 400, 1200):
+    excerpt = date_excerpt("\r\n".join(lines), budget=budget, context_lines=0)
+    check(len(excerpt) <= budget, f"{len(excerpt)} chars within a {budget} char budget ({excerpt.count('...')} separators)")
+
+print("\n🏷️  Labels on one line, values on the next:")
+for text in (
+    "Date of Issue   Date of Expiry\r\n01/06/2025   01/06/2035",
+    "Issue Date  Expiry Date\r\n15-03-2025  14-03-2035",
+    "Valid from   Valid until\r\n01/06/2025   01/06/2035",
+    "Date of Issue 01/06/2025  Date of Expiry 01/06/2035",
+):
+    ranked = rank_candidates(scan_document(text).dates, TODAY)
+    top = ranked[0][0] if ranked else None
+    check(top is not None and top.date.year == 2035 and top.label == 'expiry',
+          f"{text.splitlines()[0]!r} -> {top.date if top else None}")
+
+print("\n" + "=" * 60)
+print("✅ Text scanner works!" if ok else "❌ Text scanner test failed")
+print("=" * 60)
+sys.exit(0 if ok else 1)
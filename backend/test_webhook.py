@@ -0,0 +1,102 @@
+"""Test webhook delivery against a local HTTP receiver (no network needed)"""
+import os
+import sys
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+# Short batch window / backoff so the test runs quickly
+os.environ.setdefault("WEBHOOK_BATCH_WINDOW_SECONDS", "0.5")
+os.environ.setdefault("WEBHOOK_RETRY_BACKOFF_SECONDS", "0.1")
+# The receiver runs on 127.0.0.1, which production refuses to deliver to
+os.environ.setdefault("WEBHOOK_ALLOW_PRIVATE_HOSTS", "true")
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.config import settings
+from app.webhook_service import webhook_dispatcher, verify_signature, validate_webhook_url, UnsafeWebhookURL
+
+SECRET = "test-secret"
+received = []
+fail_first = {"/flaky": 1}
+
+
+class Receiver(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        if fail_first.get(self.path):
+            fail_first[self.path] -= 1
+            self.send_response(503)
+            self.end_headers()
+            return
+        received.append((self.path, self.headers, body))
+        self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+server = HTTPServer(("127.0.0.1", 0), Receiver)
+threading.Thread(target=server.serve_forever, daemon=True).start()
+base_url = f"http://127.0.0.1:{server.server_port}"
+
+print("=" * 60)
+print("TESTING WEBHOOK CHANNEL")
+print("=" * 60)
+print(f"\n📡 Local receiver: {base_url}")
+
+# 3 reminders for one endpoint, 1 for an endpoint that fails once
+for i in range(3):
+    webhook_dispatcher.submit(f"{base_url}/hook", SECRET, {"type": "document.expiring", "n": i})
+webhook_dispatcher.submit(f"{base_url}/flaky", SECRET, {"type": "document.expiring", "n": 99})
+
+drained = webhook_dispatcher.wait_until_idle(timeout=10)
+stats = webhook_dispatcher.stats()
+server.shutdown()
+
+ok = True
+
+def check(condition, message):
+    global ok
+    print(f"   {'✅' if condition else '❌'} {message}")
+    ok = ok and condition
+
+print("\n🔍 Results:")
+check(drained, "Queue drained")
+hook = [r for r in received if r[0] == "/hook"]
+check(len(hook) == 1, f"Batched into one POST (got {len(hook)})")
+if hook:
+    _, headers, body = hook[0]
+    check(len(json.loads(body)["events"]) == 3, "POST carries all 3 events")
+    check(
+        verify_signature(SECRET, headers["X-DateKeeper-Timestamp"], body, headers["X-DateKeeper-Signature"]),
+        "Signature verifies"
+    )
+check(any(r[0] == "/flaky" for r in received), "Flaky endpoint delivered after retry")
+check(stats["retries"] >= 1 and stats["failed"] == 0, f"Stats: {stats}")
+
+webhook_dispatcher.shutdown()
+enqueued = webhook_dispatcher.stats()["enqueued"]
+webhook_dispatcher.submit(f"{base_url}/hook", SECRET, {"type": "document.expiring", "n": 100})
+check(webhook_dispatcher.stats()["enqueued"] == enqueued, "Reminders submitted after shutdown are dropped")
+
+print("\n🛡️  URL checks (private hosts not allowed):")
+settings.WEBHOOK_ALLOW_PRIVATE_HOSTS = False
+for url in ("http://127.0.0.1/hook", "http://localhost:8000/hook", "http://169.254.169.254/latest/meta-data",
+            "http://10.0.0.5/hook", "http://[::1]/hook", "http://[::ffff:192.168.1.1]/hook", "ftp://example.com/hook"):
+    try:
+        validate_webhook_url(url)
+        check(False, f"{url} accepted")
+    except UnsafeWebhookURL as e:
+        check(True, f"{url} rejected ({e})")
+try:
+    validate_webhook_url("https://93.184.215.14/hook")
+    check(True, "Public address accepted")
+except UnsafeWebhookURL as e:
+    check(False, f"Public address rejected ({e})")
+
+print("\n" + "=" * 60)
+print("✅ Webhook channel works!" if ok else "❌ Webhook test failed")
+print("=" * 60)
+sys.exit(0 if ok else 1)
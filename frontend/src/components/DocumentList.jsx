@@ -1,5 +1,5 @@
 import { useState, useEffect } from 'react';
-import { getDocuments, deleteDocument, getDocumentStats } from '../services/api';
+import { getDocuments, deleteDocument, getDocumentStats, subscribeToNotifications } from '../services/api';
 import { toast } from 'react-toastify';
 import './DocumentList.css';
 
@@ -13,9 +13,19 @@ function DocumentList({ refreshTrigger }) {
     fetchStats();
   }, [refreshTrigger]);
 
+  // Refresh when the server pushes a reminder or status change
+  useEffect(() => {
+    return subscribeToNotifications((type) => {
+      if (type === 'reminder' || type === 'status_change') {
+        fetchDocuments();
+        fetchStats();
+      }
+    });
+  }, []);
+
   const fetchDocuments = async () => {
     try {
-      const data = await getDocuments();
+      const data = await getDocuments({ fields: 'id,document_name,document_type,expiry_date,status' });
       setDocuments(data);
     } catch (error) {
       console.error('Failed to fetch documents:', error);
@@ -15,8 +15,9 @@ function DocumentScanner({ onDocumentScanned }) {
     if (!selectedFile) return;
     
     // Validate file type
-    if (!selectedFile.type.startsWith('image/')) {
-      toast.error('Please select an image file');
+    const isPdf = selectedFile.type === 'application/pdf';
+    if (!selectedFile.type.startsWith('image/') && !isPdf) {
+      toast.error('Please select an image or PDF file');
       return;
     }
     
@@ -27,6 +28,13 @@ function DocumentScanner({ onDocumentScanned }) {
     }
     
     setFile(selectedFile);
+    setResult(null);
+    
+    // PDFs have no inline preview - show the file name instead
+    if (isPdf) {
+      setPreview('pdf');
+      return;
+    }
     
     // Create preview
     const reader = new FileReader();
@@ -34,8 +42,6 @@ function DocumentScanner({ onDocumentScanned }) {
       setPreview(reader.result);
     };
     reader.readAsDataURL(selectedFile);
-    
-    setResult(null);
   };
 
   const handleScanDocument = async () => {
@@ -105,21 +111,28 @@ function DocumentScanner({ onDocumentScanned }) {
           <label className="file-upload-label">
             <input 
               type="file" 
-              accept="image/*" 
+              accept="image/*,application/pdf" 
               onChange={handleFileChange}
               className="file-input"
             />
             <div className="upload-box">
               <div className="upload-icon">📄</div>
               <p className="upload-text">Click to upload or drag and drop</p>
-              <p className="upload-hint">PNG, JPG, WEBP (max 10MB)</p>
+              <p className="upload-hint">PNG, JPG, WEBP or PDF (max 10MB)</p>
             </div>
           </label>
         ) : (
           <div className="preview-section">
-            <img src={preview} alt="Preview" className="preview-image" />
+            {preview === 'pdf' ? (
+              <div className="upload-box">
+                <div className="upload-icon">📄</div>
+                <p className="upload-text">{file?.name}</p>
+              </div>
+            ) : (
+              <img src={preview} alt="Preview" className="preview-image" />
+            )}
             <button onClick={handleReset} className="btn-reset">
-              🔄 Choose Different Image
+              🔄 Choose Different File
             </button>
           </div>
         )}
@@ -142,7 +155,9 @@ function DocumentScanner({ onDocumentScanned }) {
             <div className="result-details">
               <p>✅ <strong>Expiry Date:</strong> {result.expiry_date}</p>
               <p>📋 <strong>Document Type:</strong> {result.document_type}</p>
-              <p>🎯 <strong>Confidence:</strong> {result.confidence}</p>
+              <p>🎯 <strong>Confidence:</strong> {typeof result.confidence === 'number'
+                ? `${Math.round(result.confidence * 100)}%`
+                : result.confidence}</p>
             </div>
           )}
         </div>
@@ -56,6 +56,41 @@ export const extractExpiryDate = async (file) => {
   return response.data;
 };
 
+// Batch OCR: calls onResult once per document as each finishes (NDJSON stream)
+export const extractExpiryDates = async (files, onResult) => {
+  const formData = new FormData();
+  files.forEach((file) => formData.append('files', file));
+
+  const token = localStorage.getItem('token');
+  const response = await fetch(`${API_URL}/api/ocr/extract-expiry/batch`, {
+    method: 'POST',
+    body: formData,
+    headers: token ? { Authorization: `Bearer ${token}` } : {},
+  });
+  if (!response.ok) {
+    const error = await response.json().catch(() => ({}));
+    throw new Error(error.detail || `Batch upload failed (${response.status})`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  const results = [];
+  let buffer = '';
+  for (;;) {
+    const { done, value } = await reader.read();
+    buffer += decoder.decode(value || new Uint8Array(), { stream: !done });
+    const lines = buffer.split('\n');
+    buffer = lines.pop();
+    lines.filter((line) => line.trim()).forEach((line) => {
+      const result = JSON.parse(line);
+      results.push(result);
+      if (onResult) onResult(result);
+    });
+    if (done) break;
+  }
+  return results;
+};
+
 export const checkOCRHealth = async () => {
   const response = await api.get('/api/ocr/health');
   return response.data;
@@ -67,9 +102,18 @@ export const createDocument = async (documentData) => {
   return response.data;
 };
 
-export const getDocuments = async () => {
-  const response = await api.get('/api/documents/');
-  return response.data;
+// The list is keyset-paginated: follow X-Next-Cursor until the last page
+export const getDocuments = async (params = {}) => {
+  const documents = [];
+  let cursor = null;
+  do {
+    const response = await api.get('/api/documents/', {
+      params: { limit: 500, ...params, ...(cursor && { cursor }) },
+    });
+    documents.push(...response.data);
+    cursor = response.headers['x-next-cursor'];
+  } while (cursor);
+  return documents;
 };
 
 export const getDocument = async (documentId) => {
@@ -92,4 +136,26 @@ export const getDocumentStats = async () => {
   return response.data;
 };
 
+// In-app notifications (Server-Sent Events - replaces polling)
+export const getUnreadNotificationCount = async () => {
+  const response = await api.get('/api/notifications/unread-count');
+  return response.data;
+};
+
+export const subscribeToNotifications = (onEvent) => {
+  const token = localStorage.getItem('token');
+  if (!token || typeof EventSource === 'undefined') {
+    return () => {};
+  }
+
+  const source = new EventSource(
+    `${API_URL}/api/notifications/stream?token=${encodeURIComponent(token)}`
+  );
+  ['reminder', 'status_change', 'unread_count'].forEach((type) => {
+    source.addEventListener(type, (event) => onEvent(type, JSON.parse(event.data)));
+  });
+
+  return () => source.close();
+};
+
 export default api;